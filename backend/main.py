@@ -1,15 +1,39 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import httpx
+import hashlib
+import heapq
+import json
+import mmap
 import os
+import re
 import subprocess
 import sys
+import tempfile
+import threading
 import shutil
+import signal
+import socket
 import platform
+import random
 import time
+import urllib.parse
+import uuid
+import zipfile
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
 
 app = FastAPI()
 
@@ -22,14 +46,877 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Track whether the repository setup has completed successfully
-repo_setup_status = {
-    "backend_running": False,
-    "frontend_running": False
-}
+# Repository that gets cloned and run when a client doesn't ask for another one
+REPO_URL = "https://github.com/AmruthaYalla04/aichatbot.git"
+
+# Job engine: how many repositories are set up at once, how many recent log lines
+# GET /jobs/<id> includes and how many finished jobs are remembered
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_LOG_LINES = int(os.environ.get("JOB_LOG_LINES", 5000))
+JOB_HISTORY = int(os.environ.get("JOB_HISTORY", 50))
+# Status streams: the longest a long-poll request waits for a change, and how often an idle
+# event stream sends a keep-alive comment (seconds)
+STATUS_POLL_TIMEOUT = 60
+STATUS_KEEPALIVE_INTERVAL = 15
+# Each job leases a (backend, frontend) port pair for the app it launches: pair i is
+# (BACKEND_PORT_BASE + i, FRONTEND_PORT_BASE + i) for i < PORT_PAIRS
+BACKEND_PORT_BASE = int(os.environ.get("BACKEND_PORT_BASE", 8000))
+FRONTEND_PORT_BASE = int(os.environ.get("FRONTEND_PORT_BASE", 3000))
+PORT_PAIRS = int(os.environ.get("PORT_PAIRS", 100))
+# Seconds a launched service gets to exit after SIGTERM / CTRL_BREAK before it is killed
+SERVICE_STOP_TIMEOUT = float(os.environ.get("SERVICE_STOP_TIMEOUT", 10))
+
+# Cloned repositories live next to this project; dependency caches survive between runs
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.environ.get("RUNNER_WORK_DIR") or os.path.join(PROJECT_DIR, "cloned_repos")
+CACHE_DIR = os.path.join(WORK_DIR, ".cache")
+JOBS_DIR = os.path.join(WORK_DIR, "jobs")
+MIRROR_DIR = os.path.join(WORK_DIR, ".mirrors")
+# Directories are renamed in here and deleted later by a background thread
+TRASH_DIR = os.path.join(WORK_DIR, ".trash")
+# Every job's log is appended to <LOG_DIR>/<job id>.log; the byte offset of every
+# LOG_INDEX_STRIDE-th line is kept in memory, so reading from any line is a seek plus a
+# short scan
+LOG_DIR = os.path.join(WORK_DIR, "logs")
+LOG_INDEX_STRIDE = 64
+LOG_READ_MAX_LINES = 10000
+# Messages queued for one viewer of a job before it is skipped forward to the live log
+LOG_VIEWER_QUEUE = int(os.environ.get("LOG_VIEWER_QUEUE", 5000))
+# Lines replayed to a viewer when it attaches, read LOG_REPLAY_CHUNK at a time; older lines
+# are left to GET /jobs/<id>/log
+LOG_REPLAY_LINES = int(os.environ.get("LOG_REPLAY_LINES", 10000))
+LOG_REPLAY_CHUNK = 500
+# Ready-made virtual environments waiting to be moved into a workspace (POSIX only;
+# VENV_POOL_SIZE=0 turns the pool off)
+VENV_POOL_DIR = os.path.join(WORK_DIR, ".venv-pool")
+VENV_POOL_SIZE = int(os.environ.get("VENV_POOL_SIZE", 2))
+
+# Seconds between trash sweeps when nothing new is trashed (catches entries that failed to delete)
+TRASH_SWEEP_INTERVAL = 300
+
+# Disk budgets for the dependency caches (bytes)
+VENV_CACHE_MAX_BYTES = int(os.environ.get("VENV_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+NODE_MODULES_CACHE_MAX_BYTES = int(os.environ.get("NODE_MODULES_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+WHEEL_CACHE_MAX_BYTES = int(os.environ.get("WHEEL_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+
+# Matches git --progress lines such as
+# "Receiving objects:  45% (123/456), 1.20 MiB | 2.30 MiB/s"
+GIT_PROGRESS_RE = re.compile(
+    r"^(?:remote:\s*)?(?P<phase>[A-Za-z ]+):\s+(?P<percent>\d+)%\s+\((?P<current>\d+)/(?P<total>\d+)\)"
+    r"(?:,\s*(?P<size>[\d.]+)\s*(?P<unit>[KMGT]?i?B))?"
+)
+# Archive downloads are streamed in chunks of this size; without a Content-Length,
+# progress is reported every ARCHIVE_PROGRESS_BYTES
+ARCHIVE_CHUNK_SIZE = 256 * 1024
+ARCHIVE_PROGRESS_BYTES = 1024 * 1024
+# Archives are extracted by this many threads; files of at least ARCHIVE_PREALLOCATE_BYTES
+# get their full size reserved before writing, and ARCHIVE_FILE_OVERHEAD is the per-file
+# cost (in bytes) used when balancing work between threads
+ARCHIVE_EXTRACT_WORKERS = int(os.environ.get("ARCHIVE_EXTRACT_WORKERS", min(32, os.cpu_count() or 1)))
+ARCHIVE_PREALLOCATE_BYTES = 1024 * 1024
+ARCHIVE_FILE_OVERHEAD = 16 * 1024
+# Outbound HTTP: one pooled client with keep-alive is shared by health checks and downloads
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = 30.0
+http_client = None
+
+# Readiness probing for launched services: how long each may take to answer, and the
+# bounds of the jittered exponential backoff between probes (seconds)
+BACKEND_READY_TIMEOUT = float(os.environ.get("BACKEND_READY_TIMEOUT", 120))
+FRONTEND_READY_TIMEOUT = float(os.environ.get("FRONTEND_READY_TIMEOUT", 300))
+READY_INITIAL_DELAY = 0.1
+READY_MAX_DELAY = 5.0
+READY_PROBE_TIMEOUT = 2.0
+
+# Log batching: lines are coalesced into one frame for up to LOG_FLUSH_INTERVAL seconds
+LOG_FLUSH_INTERVAL = 0.05
+LOG_MAX_BATCH_BYTES = 32 * 1024
+# Messages starting with one of these markers are sent immediately
+LOG_FLUSH_MARKERS = ("STEP", "✅", "❌", "⚠️", "Error", "[SUCCESS]")
+
+# Limits for streaming subprocess output
+COMMAND_STREAM_LIMIT = 64 * 1024  # bytes read from a pipe at a time
+COMMAND_MAX_LINE = 8 * 1024  # longer lines are truncated
+COMMAND_TAIL_LINES = 200  # lines kept for error reporting
+
+# Resource accounting: running subprocesses are sampled from /proc this often (seconds)
+USAGE_SAMPLE_INTERVAL = 0.2
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# Spans recorded per run beyond this are counted but not kept
+TRACE_MAX_SPANS = 10000
+
+SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4}
+
+
+class LogChannel:
+    """Per-connection log sender that coalesces lines into fewer WebSocket frames.
+
+    Lines are buffered and sent as one newline-joined frame after a short delay or once
+    the batch grows past a size limit. Step boundaries, warnings and errors flush at once.
+    """
+
+    def __init__(self, websocket, flush_interval=LOG_FLUSH_INTERVAL, max_batch_bytes=LOG_MAX_BATCH_BYTES):
+        self.websocket = websocket
+        self.flush_interval = flush_interval
+        self.max_batch_bytes = max_batch_bytes
+        self._lines = []
+        self._size = 0
+        self._timer = None
+        self._lock = asyncio.Lock()
+
+    async def send_text(self, message, flush=None):
+        if flush is None:
+            flush = message.lstrip().startswith(LOG_FLUSH_MARKERS)
+        self._lines.append(message)
+        self._size += len(message) + 1
+        if flush or self._size >= self.max_batch_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # The next explicit flush will surface the failure to the caller
+            print(f"Timed log flush failed: {str(e)}")
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._lines:
+                return
+            batch = "\n".join(self._lines)
+            self._lines = []
+            self._size = 0
+            await self.websocket.send_text(batch)
+
+    async def close(self):
+        await self.flush()
+
+
+class TaggedLog:
+    """Prefixes every line with a branch tag so output from concurrent steps stays readable"""
+
+    def __init__(self, log, tag):
+        self.log = log
+        self.tag = tag
+
+    async def send_text(self, message, flush=None):
+        if flush is None:
+            flush = message.lstrip().startswith(LOG_FLUSH_MARKERS)
+        await self.log.send_text(f"[{self.tag}] {message}", flush=flush)
+
+
+class LogStore:
+    """Append-only log file with a sparse offset index, addressed by line number.
+
+    Messages are split into lines and appended to <path>. The byte offset of every
+    LOG_INDEX_STRIDE-th line is kept in memory (logs don't outlive the runner), so read()
+    seeks straight to the nearest indexed line of a memory-mapped view.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = []
+        self.lines = 0
+        self.size = 0
+        self._file = None
+
+    def append(self, message):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "ab")
+        for line in message.split("\n"):
+            if self.lines % LOG_INDEX_STRIDE == 0:
+                self.index.append(self.size)
+            data = line.encode("utf-8", "replace") + b"\n"
+            self._file.write(data)
+            self.size += len(data)
+            self.lines += 1
+
+    def _seek(self, view, line):
+        """Byte offset where line starts"""
+        if line >= self.lines:
+            return self.size
+        position = self.index[line // LOG_INDEX_STRIDE]
+        for _ in range(line % LOG_INDEX_STRIDE):
+            position = view.find(b"\n", position) + 1
+        return position
+
+    def read(self, offset, limit):
+        """Return up to limit lines starting at line offset"""
+        end = min(self.lines, offset + limit)
+        if offset >= end:
+            return []
+        if self._file is not None:
+            self._file.flush()
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            data = view[self._seek(view, offset):self._seek(view, end)]
+        return data.decode("utf-8", "replace").split("\n")[:-1]
+
+    def close(self):
+        """Close the file; a later append reopens it"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LogSubscriber:
+    """One viewer of a job's log, fed from a bounded queue by its own task.
+
+    The task first replays lines start to end of store (if given) a chunk at a time, then
+    delivers what was published in the meantime. Publishing never waits for the viewer. If
+    the viewer falls more than max_queue messages behind, its backlog is dropped and it skips
+    forward: it gets an "[OFFSET] <line>" marker and carries on with the live log. Skipped
+    lines stay readable from GET /jobs/<id>/log.
+    """
+
+    def __init__(self, viewer, store=None, start=0, end=0, max_queue=LOG_VIEWER_QUEUE):
+        self.viewer = viewer
+        self.max_queue = max_queue
+        self.queue = collections.deque()
+        self.skipped = 0
+        self.failed = False
+        self._replay = (store, start, end) if store is not None else None
+        self._pending = asyncio.Event()
+        self._idle = asyncio.Event()
+        if self._replay:
+            self._pending.set()
+        else:
+            self._idle.set()
+        self._task = asyncio.create_task(self._deliver())
+
+    def publish(self, message, flush, offset):
+        """Queue message; offset is the log's line count after it"""
+        if len(self.queue) >= self.max_queue:
+            self.queue.clear()
+            self.skipped += 1
+            message, flush = f"[OFFSET] {offset}", True
+        self.queue.append((message, flush))
+        self._idle.clear()
+        self._pending.set()
+
+    async def _deliver(self):
+        try:
+            if self._replay:
+                store, start, end = self._replay
+                self._replay = None
+                await self.viewer.send_text(f"[OFFSET] {start}", flush=False)
+                for chunk_start in range(start, end, LOG_REPLAY_CHUNK):
+                    # The viewer batches these into frames of at most its batch size
+                    for line in store.read(chunk_start, min(LOG_REPLAY_CHUNK, end - chunk_start)):
+                        await self.viewer.send_text(line, flush=False)
+            while True:
+                await self._pending.wait()
+                self._pending.clear()
+                while self.queue:
+                    message, flush = self.queue.popleft()
+                    await self.viewer.send_text(message, flush=flush)
+                self._idle.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The viewer went away; the job carries on without it
+            self.failed = True
+            self.queue.clear()
+            self._idle.set()
+
+    async def drain(self):
+        """Wait until everything published so far has been handed to the viewer"""
+        await self._idle.wait()
+
+    def close(self):
+        self._task.cancel()
+
+
+class JobLog:
+    """Log of a single job: appends lines to its LogStore and broadcasts them to subscribed viewers.
+
+    Each message is stored once and published to every subscriber's queue, so any number
+    of viewers can watch one job and none of them can hold it up.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.subscribers = {}
+
+    async def send_text(self, message, flush=None):
+        self.store.append(message)
+        for viewer, subscriber in list(self.subscribers.items()):
+            if subscriber.failed:
+                self.detach(viewer)
+            else:
+                subscriber.publish(message, flush, self.store.lines)
+
+    def attach(self, viewer, offset=0):
+        """Replay the log from line offset into viewer and subscribe it to new lines.
+
+        At most the last LOG_REPLAY_LINES lines are replayed. The replay starts with an
+        "[OFFSET] <line>" marker, so a viewer that counts the lines after it always knows
+        where to resume from, and that lines before it were skipped.
+        """
+        offset = min(max(offset, 0), self.store.lines)
+        start = max(offset, self.store.lines - LOG_REPLAY_LINES)
+        self.subscribers[viewer] = LogSubscriber(viewer, self.store, start, self.store.lines)
+
+    async def drain(self, viewer):
+        subscriber = self.subscribers.get(viewer)
+        if subscriber is not None:
+            await subscriber.drain()
+
+    def detach(self, viewer):
+        subscriber = self.subscribers.pop(viewer, None)
+        if subscriber is not None:
+            subscriber.close()
+
+    def tail(self, count):
+        """The last count lines"""
+        return self.store.read(max(0, self.store.lines - count), count)
+
+
+# === Tracing ===
+
+# The trace of the run the current task belongs to, and the innermost open span in it
+current_trace = contextvars.ContextVar("current_trace", default=None)
+current_span = contextvars.ContextVar("current_span", default=None)
+
+def new_trace(trace_id):
+    return {"trace_id": trace_id, "spans": [], "dropped_spans": 0}
+
+@contextlib.contextmanager
+def trace_span(name, **attributes):
+    """Record the enclosed work as a span of the current run's trace, nested under the open span.
+
+    Yields the span so callers can add attributes (exit codes, byte counts) or set its
+    status. Outside a traced run the span is simply not kept.
+    """
+    parent = current_span.get()
+    span = {
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "end": None,
+        "duration": None,
+        "status": "ok",
+        "attributes": attributes,
+    }
+    trace = current_trace.get()
+    if trace is not None:
+        if len(trace["spans"]) < TRACE_MAX_SPANS:
+            trace["spans"].append(span)
+        else:
+            trace["dropped_spans"] += 1
+    token = current_span.set(span)
+    started = time.monotonic()
+    try:
+        yield span
+    except asyncio.CancelledError:
+        span["status"] = "cancelled"
+        raise
+    except BaseException as e:
+        span["status"] = "error"
+        span["attributes"]["error"] = str(e)
+        raise
+    finally:
+        current_span.reset(token)
+        span["duration"] = time.monotonic() - started
+        span["end"] = span["start"] + span["duration"]
+
+def traced(name):
+    """Record every call of an async function as a span; simple return values become its result"""
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with trace_span(name) as span:
+                result = await function(*args, **kwargs)
+                if result is None or isinstance(result, (bool, int, float, str)):
+                    span["attributes"]["result"] = result
+                return result
+        return wrapper
+    return decorate
+
+
+def hash_inputs(paths, *extra):
+    """Hash the contents of the given files plus any extra values into a cache key"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    for value in extra:
+        digest.update(str(value).encode())
+    return digest.hexdigest()[:32]
+
+def directory_size(path):
+    """Total size in bytes of the regular files under path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def link_directory(target, link_path):
+    """Point link_path at target, returning False where directory links aren't available"""
+    try:
+        os.symlink(target, link_path, target_is_directory=True)
+        return True
+    except (OSError, NotImplementedError):
+        return False
+
+def remove_directory(path):
+    """Remove a directory, or just the link if path is a link to one.
+
+    The directory is renamed into TRASH_DIR, which is instant, and the trash reaper
+    deletes it later. Only if the rename fails is it deleted in place.
+    """
+    if os.path.islink(path):
+        os.unlink(path)
+        return
+    if not os.path.exists(path):
+        return
+    try:
+        os.makedirs(TRASH_DIR, exist_ok=True)
+        os.rename(path, os.path.join(TRASH_DIR, f"{os.path.basename(path)}-{uuid.uuid4().hex[:8]}"))
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    start_trash_reaper()
+    trash_pending.set()
+
+# The reaper wakes when something is trashed, and also sweeps leftovers from earlier runs
+trash_pending = threading.Event()
+trash_reaper = None
+trash_reaper_lock = threading.Lock()
+
+def start_trash_reaper():
+    """Start the background deletion thread if it isn't running yet"""
+    global trash_reaper
+    with trash_reaper_lock:
+        if trash_reaper is None or not trash_reaper.is_alive():
+            trash_reaper = threading.Thread(target=reap_trash, name="trash-reaper", daemon=True)
+            trash_reaper.start()
+
+def reap_trash():
+    """Delete everything in TRASH_DIR, one entry at a time, at the lowest CPU priority"""
+    if hasattr(os, "setpriority") and hasattr(threading, "get_native_id"):
+        try:
+            # On Linux this lowers the priority of this thread only
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except OSError:
+            pass
+    while True:
+        trash_pending.clear()
+        try:
+            entries = os.listdir(TRASH_DIR)
+        except OSError:
+            entries = []
+        for name in entries:
+            path = os.path.join(TRASH_DIR, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        trash_pending.wait(TRASH_SWEEP_INTERVAL)
+
+
+class DirectoryCache:
+    """Content-addressed store of directories with LRU eviction under a disk budget.
+
+    Each entry lives in <root>/<key> and only counts once commit() has written its marker
+    file. The marker records the entry size and its mtime is the last-used time, so
+    eviction never has to walk the cached trees. Entries that are linked into a workspace
+    are leased by their owner and never evicted.
+    """
+
+    MARKER = ".cache-entry.json"
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._leases = {}
+
+    def lease(self, key, owner):
+        """Keep an entry from being evicted while owner uses it; an owner leases one entry"""
+        self._leases[owner] = key
+
+    def release(self, owner):
+        self._leases.pop(owner, None)
+
+    def lock(self, key):
+        """Lock serialising builds of one entry across concurrent jobs"""
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def lookup(self, key):
+        """Return the path of a complete entry and mark it as recently used, or None"""
+        marker = os.path.join(self.entry_path(key), self.MARKER)
+        if not os.path.exists(marker):
+            return None
+        os.utime(marker)
+        return self.entry_path(key)
+
+    def prepare(self, key, owner=None):
+        """Return an empty directory for building the entry, discarding any partial attempt.
+
+        Returns None if another owner has leased the entry: its partial attempt may still be
+        in use from that owner's workspace.
+        """
+        if any(leased == key and other != owner for other, leased in self._leases.items()):
+            return None
+        path = self.entry_path(key)
+        remove_directory(path)
+        os.makedirs(path)
+        return path
+
+    async def commit(self, key):
+        """Mark a built entry as complete, then evict old entries if over budget"""
+        path = self.entry_path(key)
+        size = await asyncio.to_thread(directory_size, path)
+        with open(os.path.join(path, self.MARKER), "w") as f:
+            json.dump({"key": key, "size": size, "created": time.time()}, f)
+        await asyncio.to_thread(self.evict, key)
+
+    def entries(self):
+        """List complete entries as (last_used, size, key), oldest first"""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for key in os.listdir(self.root):
+            marker = os.path.join(self.root, key, self.MARKER)
+            try:
+                with open(marker) as f:
+                    size = json.load(f).get("size", 0)
+                result.append((os.path.getmtime(marker), size, key))
+            except (OSError, ValueError):
+                continue
+        return sorted(result)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = self.entries()
+        leased = set(self._leases.values())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in leased:
+                continue
+            remove_directory(self.entry_path(key))
+            total -= size
+            print(f"Evicted cache entry {key} from {self.root}")
+
 
+def release_lock(ctx, name):
+    """Release a lock a step acquired and left in the run context, if it hasn't been released yet"""
+    lock = ctx.pop(name, None)
+    if lock is not None:
+        lock.release()
 
 
+venv_cache = DirectoryCache(os.path.join(CACHE_DIR, "venvs"), VENV_CACHE_MAX_BYTES)
+node_modules_cache = DirectoryCache(os.path.join(CACHE_DIR, "node_modules"), NODE_MODULES_CACHE_MAX_BYTES)
+wheel_cache = DirectoryCache(os.path.join(CACHE_DIR, "wheels"), WHEEL_CACHE_MAX_BYTES)
+
+
+def relocate_venv(old_path, new_path, directory=None):
+    """Rewrite the absolute paths venv bakes into an environment from old_path to new_path.
+
+    The activate scripts, the shebangs of the console scripts and pyvenv.cfg name the
+    environment's own directory; everything else in it is location independent. The
+    environment is at directory, by default already at new_path.
+    """
+    old, new = old_path.encode(), new_path.encode()
+    directory = directory or new_path
+    bin_dir = os.path.join(directory, "bin")
+    paths = [os.path.join(directory, "pyvenv.cfg")] + [os.path.join(bin_dir, name) for name in os.listdir(bin_dir)]
+    for path in paths:
+        # bin/python* are links to the base interpreter
+        if os.path.islink(path) or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        if old in content:
+            with open(path, "wb") as f:
+                f.write(content.replace(old, new))
+
+class VenvPool:
+    """A few pre-created virtual environments, handed out by moving them into a workspace.
+
+    Templates are built in the background with `python -m venv` (pip included) under
+    <root>/<interpreter key>, so taking one is a rename plus relocate_venv() instead of
+    an interpreter bootstrap and ensurepip. The pool refills itself after every take.
+    """
+
+    def __init__(self, root, size):
+        self.root = root
+        self.size = size
+        self._filling = None
+
+    def enabled(self):
+        # Windows venvs have the environment path compiled into their .exe launchers
+        return self.size > 0 and os.name != "nt"
+
+    async def directory(self):
+        """Template directory for the current interpreter, the one `python -m venv` would use"""
+        interpreter = await get_tool_version('python -c "import sys; print(sys.version)"')
+        return os.path.join(self.root, hash_inputs([], interpreter))
+
+    @staticmethod
+    def templates(directory):
+        try:
+            return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+        except FileNotFoundError:
+            return []
+
+    async def take(self, target):
+        """Move a template to target (absent or an empty directory); False if none is ready"""
+        if not self.enabled():
+            return False
+        try:
+            directory = await self.directory()
+            for name in self.templates(directory):
+                template = os.path.join(directory, name)
+                try:
+                    os.rename(template, target)
+                except FileNotFoundError:
+                    # Taken by a concurrent job
+                    continue
+                except OSError:
+                    # target is on another filesystem, or not empty
+                    return False
+                await asyncio.to_thread(relocate_venv, template, target)
+                return True
+            return False
+        finally:
+            self.refill()
+
+    def refill(self):
+        """Top the pool up in the background unless that is already happening"""
+        if self.enabled() and (self._filling is None or self._filling.done()):
+            # An empty context keeps the builds out of the current job's trace and usage
+            self._filling = contextvars.Context().run(asyncio.create_task, self._fill())
+
+    def stop(self):
+        if self._filling is not None:
+            self._filling.cancel()
+
+    async def _fill(self):
+        async def discard(label, text):
+            pass
+
+        try:
+            directory = await self.directory()
+            # Templates of another interpreter are never handed out, and half-built ones are
+            # left over from an interrupted fill
+            for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+                if name != os.path.basename(directory):
+                    remove_directory(os.path.join(self.root, name))
+            for name in os.listdir(directory) if os.path.isdir(directory) else []:
+                if name.startswith("."):
+                    remove_directory(os.path.join(directory, name))
+            os.makedirs(directory, exist_ok=True)
+
+            while len(self.templates(directory)) < self.size:
+                name = uuid.uuid4().hex[:12]
+                building = os.path.join(directory, f".{name}")
+                returncode, tail = await stream_command(f'python -m venv "{building}"', None, discard)
+                if returncode != 0:
+                    print(f"Could not build a venv template: {' '.join(tail[-3:])}")
+                    remove_directory(building)
+                    return
+                template = os.path.join(directory, name)
+                # Only a finished template becomes visible to take()
+                await asyncio.to_thread(relocate_venv, building, template, building)
+                os.rename(building, template)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Could not fill the venv pool: {str(e)}")
+
+venv_pool = VenvPool(VENV_POOL_DIR, VENV_POOL_SIZE)
+
+
+def port_is_free(port):
+    """True if nothing is listening on port (checked the way uvicorn and the dev server bind)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if os.name != "nt":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("0.0.0.0", port))
+            return True
+        except OSError:
+            return False
+
+class PortAllocator:
+    """Leases (backend, frontend) port pairs so several cloned apps can run side by side.
+
+    A pair is handed out only if neither port is leased to someone else or already bound
+    by another process, e.g. an app started outside the runner or the runner's own 3002/8002.
+    """
+
+    def __init__(self, backend_base, frontend_base, count):
+        self.backend_base = backend_base
+        self.frontend_base = frontend_base
+        self.count = count
+        self.leased = {}
+
+    def lease(self, owner):
+        """Return owner's (backend_port, frontend_port), leasing a free pair if it has none"""
+        if owner in self.leased:
+            return self.leased[owner]
+        taken = set(self.leased.values())
+        for index in range(self.count):
+            pair = (self.backend_base + index, self.frontend_base + index)
+            if pair not in taken and port_is_free(pair[0]) and port_is_free(pair[1]):
+                self.leased[owner] = pair
+                return pair
+        raise RuntimeError(f"No free port pair among the {self.count} configured (all leased or in use)")
+
+    def release(self, owner):
+        self.leased.pop(owner, None)
+
+port_allocator = PortAllocator(BACKEND_PORT_BASE, FRONTEND_PORT_BASE, PORT_PAIRS)
+
+# One lock per repository mirror
+mirror_locks = {}
+
+# Tool versions are part of the cache keys; look each one up only once
+tool_versions = {}
+
+async def get_tool_version(command):
+    """Return the version output of a tool such as python or node"""
+    if command not in tool_versions:
+        lines = []
+        
+        async def collect(label, text):
+            lines.append(text)
+        
+        returncode, _ = await stream_command(command, None, collect)
+        if returncode != 0:
+            raise Exception(f"Could not determine version with: {command}")
+        tool_versions[command] = "\n".join(lines)
+    return tool_versions[command]
+
+def link_tree(src, dst):
+    """Recreate src at dst with hard links, copying only files that can't be linked"""
+    def link_or_copy(source, target):
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+    
+    # Build caches (babel, eslint) are per-workspace and get rewritten in place
+    def ignore_build_caches(directory, names):
+        return [".cache"] if os.path.samefile(directory, src) and ".cache" in names else []
+    
+    shutil.copytree(src, dst, symlinks=True, copy_function=link_or_copy, ignore=ignore_build_caches)
+
+@traced("node_modules.restore")
+async def restore_node_modules(websocket, frontend_dir):
+    """Restore node_modules from the store if the lock file is unchanged.
+
+    Returns (key, hit); key is None when the frontend can't be cached.
+    """
+    lock_path = os.path.join(frontend_dir, "package-lock.json")
+    if not os.path.exists(lock_path):
+        lock_path = os.path.join(frontend_dir, "package.json")
+    if not os.path.exists(lock_path):
+        return None, False
+    
+    node_version = await get_tool_version("node --version")
+    key = hash_inputs([lock_path], node_version)
+    async with node_modules_cache.lock(key):
+        cached = node_modules_cache.lookup(key)
+        if not cached:
+            await websocket.send_text(f"No cached node_modules for {os.path.basename(lock_path)} ({key})")
+            return key, False
+        
+        node_modules_dir = os.path.join(frontend_dir, "node_modules")
+        await websocket.send_text(f"Restoring node_modules from cache {key}...")
+        await asyncio.to_thread(remove_directory, node_modules_dir)
+        await asyncio.to_thread(link_tree, os.path.join(cached, "node_modules"), node_modules_dir)
+    await websocket.send_text("node_modules restored from cache")
+    return key, True
+
+@traced("node_modules.store")
+async def store_node_modules(websocket, frontend_dir, key):
+    """Add a freshly installed node_modules to the store; failures only cost the cache"""
+    node_modules_dir = os.path.join(frontend_dir, "node_modules")
+    if not os.path.isdir(node_modules_dir):
+        return
+    try:
+        async with node_modules_cache.lock(key):
+            # Another job may have stored the same dependencies in the meantime
+            if node_modules_cache.lookup(key):
+                return
+            entry = node_modules_cache.prepare(key)
+            await asyncio.to_thread(link_tree, node_modules_dir, os.path.join(entry, "node_modules"))
+            await node_modules_cache.commit(key)
+        await websocket.send_text(f"Stored node_modules in cache as {key}")
+    except Exception as e:
+        await websocket.send_text(f"Warning: Could not cache node_modules: {str(e)}")
+
+@traced("wheelhouse")
+async def install_from_wheelhouse(websocket, backend_dir, pip_command):
+    """Install the backend requirements offline from the shared wheelhouse.
+
+    The wheelhouse keeps prebuilt wheels per interpreter and platform. Requirements it
+    can't satisfy yet are built into it with `pip wheel` first, so only new packages ever
+    touch the network or a compiler. pip_command(args) builds the pip command line for the venv.
+    """
+    # Wheels with C extensions only fit the interpreter and platform they were built for
+    interpreter = await get_tool_version('python -c "import sys, sysconfig; print(sys.version, sysconfig.get_platform())"')
+    key = hash_inputs([], interpreter)
+
+    def offline_install(wheelhouse):
+        return pip_command(f'install --no-index --find-links "{wheelhouse}" -r requirements.txt')
+
+    wheelhouse = wheel_cache.lookup(key)
+    if wheelhouse:
+        try:
+            await run_command_with_status(websocket, offline_install(wheelhouse), backend_dir)
+            await websocket.send_text(f"Installed from wheelhouse {key}")
+            return
+        except Exception:
+            await websocket.send_text("Wheelhouse is missing some requirements")
+
+    # One build at a time per wheelhouse; wheels already there are reused, not rebuilt
+    async with wheel_cache.lock(key):
+        wheelhouse = wheel_cache.lookup(key) or wheel_cache.prepare(key)
+        await websocket.send_text(f"Building wheels into wheelhouse {key}...")
+        await run_command_with_status(
+            websocket, pip_command(f'wheel -r requirements.txt -w "{wheelhouse}" --find-links "{wheelhouse}"'), backend_dir
+        )
+        await wheel_cache.commit(key)
+    await run_command_with_status(websocket, offline_install(wheelhouse), backend_dir)
+    await websocket.send_text(f"Installed from wheelhouse {key}")
+
 # === API Endpoints from both files ===
 
 @app.get("/")
@@ -38,7 +925,166 @@ async def root():
 
 @app.get("/status")
 async def status():
-    return repo_setup_status
+    """Status of the most recently submitted job (see /jobs/<id>/events for one job's status as it changes)"""
+    if not jobs:
+        return {"backend_running": False, "frontend_running": False}
+    latest = max(jobs.values(), key=lambda job: job["created"])
+    return latest["status"]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-step resource usage in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.post("/jobs")
+async def submit_job(request: Request):
+    """Queue a repository for setup; body: {"repo_url": ..., "ref": ...}"""
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    repo_url = (body or {}).get("repo_url") or REPO_URL
+    ref = (body or {}).get("ref")
+    if not isinstance(repo_url, str) or (ref is not None and not isinstance(ref, str)):
+        raise HTTPException(status_code=400, detail="repo_url and ref must be strings")
+    job = create_job(repo_url, ref)
+    return job_summary(job)
+
+@app.get("/jobs")
+async def list_jobs():
+    return [job_summary(job) for job in sorted(jobs.values(), key=lambda job: job["created"])]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_or_404(job_id)
+    summary = job_summary(job)
+    summary["logs"] = job["log"].tail(JOB_LOG_LINES)
+    summary["viewers"] = len(job["log"].subscribers)
+    return summary
+
+@app.get("/jobs/{job_id}/log")
+async def read_job_log(job_id: str, offset: int = 0, limit: int = 1000):
+    """Lines of a job's log from line offset on; continue from next_offset"""
+    job = get_job_or_404(job_id)
+    if offset < 0 or limit < 1:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit >= 1")
+    store = job["log"].store
+    lines = store.read(offset, min(limit, LOG_READ_MAX_LINES))
+    return {"job_id": job_id, "offset": offset, "next_offset": offset + len(lines), "total": store.lines, "lines": lines}
+
+@app.get("/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str, name: str = None, status: str = None, min_duration: float = None):
+    """Download a job's trace as JSON, optionally only spans whose name starts with name,
+    that ended with status, or that took at least min_duration seconds"""
+    job = get_job_or_404(job_id)
+    spans = [
+        span for span in job["trace"]["spans"]
+        if (name is None or span["name"].startswith(name))
+        and (status is None or span["status"] == status)
+        and (min_duration is None or (span["duration"] or 0) >= min_duration)
+    ]
+    trace = {
+        "trace_id": job["trace"]["trace_id"],
+        "repo_url": job["repo_url"],
+        "ref": job["ref"],
+        "state": job["state"],
+        "dropped_spans": job["trace"]["dropped_spans"],
+        "spans": spans,
+    }
+    return JSONResponse(trace, headers={"Content-Disposition": f'attachment; filename="trace-{job_id}.json"'})
+
+@app.get("/jobs/{job_id}/status")
+async def poll_job_status(job_id: str, since: int = -1, timeout: float = 30):
+    """Long-poll a job's status: answers once its version is past since, or after timeout
+    seconds with the unchanged status"""
+    job = get_job_or_404(job_id)
+    await wait_for_change(job, since, min(max(timeout, 0), STATUS_POLL_TIMEOUT))
+    return status_snapshot(job)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_status(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's status, one event per change.
+
+    Each event's id is the status version, so a reconnecting EventSource (which sends
+    Last-Event-ID) only receives the status again if it changed in the meantime.
+    """
+    job = get_job_or_404(job_id)
+    try:
+        since = int(request.headers.get("last-event-id", -1))
+    except ValueError:
+        since = -1
+
+    async def events():
+        nonlocal since
+        # Ends once the job is deleted or pruned
+        while jobs.get(job_id) is job:
+            if await wait_for_change(job, since, STATUS_KEEPALIVE_INTERVAL):
+                snapshot = status_snapshot(job)
+                since = snapshot["version"]
+                yield f"id: {since}\ndata: {json.dumps(snapshot)}\n\n"
+            else:
+                # Lets proxies and the server notice a stream whose client has gone
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job_endpoint(job_id: str):
+    """Run a finished job again, restarting at the first step without a valid checkpoint"""
+    job = get_job_or_404(job_id)
+    resume_job(job)
+    return job_summary(job)
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel a job if it is still queued or running and remove its workspace"""
+    job = get_job_or_404(job_id)
+    await cancel_job(job)
+    jobs.pop(job_id, None)
+    touch_job(job)
+    for service in [service for service in services.values() if service["job_id"] == job_id]:
+        await stop_service(service)
+        services.pop(service["id"], None)
+    port_allocator.release(job_id)
+    venv_cache.release(job_id)
+    job["log"].store.remove()
+    await asyncio.to_thread(remove_directory, job["workspace"])
+    return {"message": f"Job {job_id} removed"}
+
+@app.get("/services")
+async def list_services():
+    return [service_summary(service) for service in services.values()]
+
+@app.get("/services/{service_id}")
+async def get_service(service_id: str):
+    service = get_service_or_404(service_id)
+    summary = service_summary(service)
+    summary["output"] = list(service["output"])
+    return summary
+
+@app.post("/services/{service_id}/stop")
+async def stop_service_endpoint(service_id: str):
+    """Stop a service and everything it started"""
+    service = get_service_or_404(service_id)
+    await stop_service(service)
+    return service_summary(service)
+
+@app.post("/services/{service_id}/restart")
+async def restart_service_endpoint(service_id: str):
+    """Restart a service on the port it was started with"""
+    service = get_service_or_404(service_id)
+    job_id = service["job_id"]
+    if job_id and service["port"]:
+        # A stopped job's ports may have been released and handed to another job since
+        try:
+            ports = port_allocator.lease(job_id)
+        except RuntimeError:
+            ports = ()
+        if service["port"] not in ports:
+            port_allocator.release(job_id)
+            raise HTTPException(status_code=409, detail=f"Port {service['port']} is no longer available to {service_id}")
+    await restart_service(service)
+    return service_summary(service)
 
 @app.get("/start-backend")
 async def start_backend():
@@ -51,25 +1097,41 @@ async def start_backend():
 
 @app.post("/execute-script")
 async def execute_script():
+    # The script starts its own backend and frontend, so it gets a port pair of its own
+    # rather than the 8000/3000 a job's services are probably holding
+    owner = f"script-{uuid.uuid4().hex[:8]}"
+    try:
+        backend_port, frontend_port = port_allocator.lease(owner)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    env = dict(os.environ, BACKEND_PORT=str(backend_port), FRONTEND_PORT=str(frontend_port))
     try:
         # Determine which script to run based on OS
         is_windows = platform.system() == "Windows"
         
+        # The terminal is started so that it only exits once the script has finished
         if is_windows:
             script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "run_commands.bat")
             # Execute the batch file directly on Windows
-            subprocess.Popen(['cmd', '/c', 'start', 'cmd', '/c', script_path], shell=True)
+            process = subprocess.Popen(['cmd', '/c', 'start', '/wait', 'cmd', '/c', script_path], shell=True, env=env)
         else:
             # For Unix systems
             script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "run_commands.sh")
             # Make the script executable
             os.chmod(script_path, 0o755)
             # Execute the shell script
-            subprocess.Popen(['gnome-terminal', '--', 'bash', script_path], shell=True)
-            
-        return {"message": "Script execution started in a new terminal window"}
+            process = subprocess.Popen(['gnome-terminal', '--wait', '--', 'bash', script_path], env=env)
     except Exception as e:
+        port_allocator.release(owner)
         raise HTTPException(status_code=500, detail=f"Failed to execute script: {str(e)}")
+    
+    release = asyncio.create_task(asyncio.to_thread(process.wait))
+    release.add_done_callback(lambda _: port_allocator.release(owner))
+    return {
+        "message": f"Script execution started in a new terminal window (backend port {backend_port}, frontend port {frontend_port})",
+        "backend_port": backend_port,
+        "frontend_port": frontend_port,
+    }
 
 @app.websocket("/ws/run-repo")
 async def run_repository(websocket: WebSocket):
@@ -77,540 +1139,1750 @@ async def run_repository(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket connection accepted")
     
+    # Batch log lines into fewer frames; step boundaries and errors still go out immediately
+    log = LogChannel(websocket)
     try:
-        # Reset status at the beginning
-        repo_setup_status["backend_running"] = False
-        repo_setup_status["frontend_running"] = False
-        
-        # Make the explanation clearer
-        await websocket.send_text("Starting repository clone and setup...")
-        await websocket.send_text("Note: Main application runs on ports 3002/8002")
-        await websocket.send_text("Note: Cloned repository will run on ports 3000/8000")
-        
-        # Define the working directory (where to clone the repo)
-        work_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cloned_repos")
-        os.makedirs(work_dir, exist_ok=True)
-        await websocket.send_text(f"Created working directory: {work_dir}")
-        
-        # STEP 1: Clean up existing repository - Must complete before moving to step 2
-        await websocket.send_text("STEP 1: Preparing for clean installation...")
-        repo_path = os.path.join(work_dir, "aichatbot")
-        repo_main_path = os.path.join(work_dir, "aichatbot-main")
-        
-        # Clean up both possible paths to avoid permission issues
-        for path_to_clean in [repo_path, repo_main_path]:
+        # ?job_id=...&offset=... resumes watching a job after a reconnect, and with &resume=1
+        # also runs it again if it has finished (see resume_job). Otherwise the
+        # connection watches the job already setting up the same repository and ref, or
+        # submits one (?repo_url=...&ref=... picks another repository, ?new=1 always submits)
+        job_id = websocket.query_params.get("job_id")
+        offset = 0
+        if job_id:
+            job = jobs.get(job_id)
+            if job is None:
+                await log.send_text(f"Error: Job {job_id} not found")
+                await log.close()
+                await websocket.close()
+                return
+            try:
+                offset = int(websocket.query_params.get("offset") or 0)
+            except ValueError:
+                offset = 0
+            if websocket.query_params.get("resume") and job["done"].is_set():
+                resume_job(job)
+        else:
+            repo_url = websocket.query_params.get("repo_url") or REPO_URL
+            ref = websocket.query_params.get("ref")
+            job = None if websocket.query_params.get("new") else find_active_job(repo_url, ref)
+            if job is not None:
+                await log.send_text(f"Watching job {job['id']}, which is already setting up this repository")
+            else:
+                job = create_job(repo_url, ref)
+        await log.send_text(f"[JOB] {job['id']}", flush=True)
+        await watch_job(websocket, log, job, offset)
+        # The job is over: flush what is left and let the viewer know nothing more is coming
+        await log.close()
+        await websocket.close()
+            
+    except WebSocketDisconnect:
+        print("WebSocket disconnected")
+    except Exception as e:
+        error_message = f"Error: {str(e)}"
+        print(error_message)
+        try:
+            await log.send_text(error_message)
+        except:
+            print("Could not send error message to client")
+    finally:
+        try:
+            await log.close()
+        except Exception:
+            print("Could not flush remaining log lines to client")
+
+
+# === Repository setup steps ===
+
+# Each step takes the log to write to and the shared run context, and returns False if
+# the steps that depend on it cannot run.
+
+async def step_prepare_workspace(log, ctx):
+    """Remove leftovers from previous runs; existing git checkouts are kept"""
+    work_dir = ctx["work_dir"]
+    
+    # STEP 1: Clean up existing repository - Must complete before moving to step 2
+    await log.send_text("STEP 1: Preparing for clean installation...")
+    repo_name = ctx["repo_name"]
+    repo_path = os.path.join(work_dir, repo_name)
+    repo_main_path = os.path.join(work_dir, f"{repo_name}-main")
+    
+    # Clean up both possible paths to avoid permission issues
+    for path_to_clean in [repo_path, repo_main_path]:
+        if is_git_checkout(path_to_clean):
+            # Existing checkouts are updated in place from the local mirror in STEP 2
+            await log.send_text(f"Found existing checkout at {path_to_clean}. It will be updated incrementally.")
+        elif os.path.exists(path_to_clean):
+            await log.send_text(f"Found existing directory. Cleaning {path_to_clean}...")
+            # Renamed into the trash right away; the contents are deleted in the background
+            remove_directory(path_to_clean)
             if os.path.exists(path_to_clean):
-                await websocket.send_text(f"Found existing directory. Cleaning {path_to_clean}...")
-                try:
-                    # Try multiple approaches to ensure directory is removed
-                    try:
-                        shutil.rmtree(path_to_clean, ignore_errors=True)
-                    except Exception:
-                        pass
-                    
-                    # If directory still exists, try with system commands
-                    if os.path.exists(path_to_clean):
-                        if platform.system() == "Windows":
-                            os.system(f'rd /s /q "{path_to_clean}" 2>nul')
-                        else:
-                            os.system(f'rm -rf "{path_to_clean}" 2>/dev/null')
-                    
-                    # Final check
-                    if not os.path.exists(path_to_clean):
-                        await websocket.send_text(f"Successfully removed directory: {path_to_clean}")
-                    else:
-                        # Last resort: Create a timestamp directory instead
-                        await websocket.send_text(f"Could not remove directory. Will use a timestamped directory instead.")
-                except Exception as e:
-                    await websocket.send_text(f"Error during cleanup: {str(e)}")
+                await log.send_text(f"❌ ERROR: Could not remove directory: {path_to_clean}")
+                return False
+            await log.send_text(f"Successfully removed directory: {path_to_clean}")
+    
+    await log.send_text("✅ STEP 1 COMPLETE: Environment prepared")
+    
+    ctx["repo_path"] = repo_path
+    return True
+
+async def step_clone_repository(log, ctx):
+    """Fetch the repository, falling back to the ZIP archive"""
+    work_dir = ctx["work_dir"]
+    repo_path = ctx["repo_path"]
+    repo_url = ctx["repo_url"]
+    
+    # STEP 2: Clone the repository (retry multiple times if needed)
+    await log.send_text(f"STEP 2: Cloning repository from {repo_url}...")
+    clone_success = False
+    actual_repo_path = repo_path  # Default path
+    
+    # First attempt: fetch into the local mirror and check out from it, without blocking the event loop
+    try:
+        clone_success = await clone_repository(log, repo_url, repo_path, ctx["ref"])
+        if clone_success:
+            actual_repo_path = repo_path
+            await log.send_text("Repository checked out successfully!")
+    except Exception as e:
+        await log.send_text(f"Error during git clone: {str(e)}")
         
-        # Ensure we have a clean directory to work with
-        timestamp = int(time.time())
-        if os.path.exists(repo_path):
-            repo_path = os.path.join(work_dir, f"aichatbot_{timestamp}")
-            await websocket.send_text(f"Using alternative directory: {repo_path}")
+    # Second attempt: ZIP download if git failed (GitHub repositories only)
+    zip_url = zip_url_for(repo_url, ctx["ref"])
+    if not clone_success and not zip_url:
+        await log.send_text("No ZIP archive available for this repository host")
+    elif not clone_success:
+        await log.send_text("Git clone failed. Trying ZIP download method...")
+        try:
+            await log.send_text(f"Downloading from {zip_url}...")
+            extracted_dir = await download_archive(log, zip_url, work_dir)
             
-        await websocket.send_text("✅ STEP 1 COMPLETE: Environment prepared")
+            # Use the extracted directory (GitHub names it <repo>-<branch>)
+            if extracted_dir and os.path.exists(extracted_dir) and os.listdir(extracted_dir):
+                clone_success = True
+                actual_repo_path = extracted_dir
+                await log.send_text(f"Repository downloaded and extracted to {actual_repo_path}")
+            elif extracted_dir:
+                await log.send_text("ZIP extraction completed but directory is empty or not found")
+        except Exception as e:
+            await log.send_text(f"Error during ZIP download: {str(e)}")
+    
+    # Failure check - if both methods failed, we cannot continue
+    if not clone_success:
+        await log.send_text("❌ ERROR: All repository download methods failed.")
+        await log.send_text("Cannot proceed without repository files.")
+        return False
         
-        # STEP 2: Clone the repository (retry multiple times if needed)
-        await websocket.send_text("STEP 2: Cloning repository from https://github.com/AmruthaYalla04/aichatbot.git...")
-        clone_success = False
-        actual_repo_path = repo_path  # Default path
+    await log.send_text("✅ STEP 2 COMPLETE: Repository downloaded successfully")
+    
+    ctx["repo_dir"] = actual_repo_path
+    return True
+
+async def step_locate_base_dir(log, ctx):
+    """Use the chatbot directory if the repository has one"""
+    actual_repo_path = ctx["repo_dir"]
+    
+    # STEP 3: Navigate to chatbot directory if it exists
+    await log.send_text("STEP 3: Checking for chatbot directory...")
+    chatbot_path = os.path.join(actual_repo_path, "chatbot")
+    
+    if os.path.exists(chatbot_path) and os.path.isdir(chatbot_path):
+        base_dir = chatbot_path
+        await log.send_text(f"Found chatbot directory at {chatbot_path}")
+    else:
+        base_dir = actual_repo_path
+        await log.send_text(f"No chatbot directory found. Using repository root: {actual_repo_path}")
+    
+    await log.send_text("✅ STEP 3 COMPLETE: Base directory set to " + base_dir)
+    
+    ctx["base_dir"] = base_dir
+    return True
+
+async def step_locate_backend(log, ctx):
+    """Find the backend directory in the checkout"""
+    base_dir = ctx["base_dir"]
+    
+    # STEP 4: Navigate to backend directory
+    await log.send_text("STEP 4: Locating backend directory...")
+    backend_dir = os.path.join(base_dir, "backend")
+    
+    # Strict error checking - fail immediately if backend dir not found
+    if not os.path.exists(backend_dir):
+        await log.send_text("❌ ERROR: Backend directory not found in cloned repository!")
+        await log.send_text("Repository structure is invalid. Cannot continue.")
+        return False
         
-        # First attempt: Git clone with system command
+    await log.send_text(f"Backend directory found at {backend_dir}")
+    await log.send_text("✅ STEP 4 COMPLETE: Backend directory located")
+    
+    ctx["backend_dir"] = backend_dir
+    return True
+
+async def step_create_venv(log, ctx):
+    """Create or reuse the backend virtual environment"""
+    backend_dir = ctx["backend_dir"]
+    
+    # STEP 5: Create virtual environment
+    await log.send_text("STEP 5: Creating Python virtual environment...")
+    
+    venv_dir = os.path.join(backend_dir, "venv")
+    # The venv cache is keyed by requirements.txt, so make sure it exists first
+    req_path = os.path.join(backend_dir, "requirements.txt")
+    if not os.path.exists(req_path):
+        await log.send_text("requirements.txt not found. Creating with basic dependencies...")
+        with open(req_path, "w") as f:
+            f.write("fastapi==0.104.1\nuvicorn==0.24.0\nwebsockets==11.0.3\njinja2==3.1.2\naiofiles==23.2.1\n")
+    
+    # Remove existing venv (or the link to a cached one) if it exists
+    if os.path.lexists(venv_dir):
+        await log.send_text("Removing existing virtual environment...")
         try:
-            if platform.system() == "Windows":
-                clone_cmd = f'git clone --depth 1 https://github.com/AmruthaYalla04/aichatbot.git "{repo_path}"'
-            else:
-                clone_cmd = f'git clone --depth 1 https://github.com/AmruthaYalla04/aichatbot.git "{repo_path}"'
-                
-            await websocket.send_text(f"Running: {clone_cmd}")
+            remove_directory(venv_dir)
+            venv_cache.release(ctx["job_id"])
+        except Exception as e:
+            await log.send_text(f"Warning: Could not remove existing venv: {str(e)}")
+    
+    # Reuse a cached environment built from the same requirements and interpreter
+    venv_created = False
+    venv_cache_key = None
+    venv_cache_hit = False
+    try:
+        interpreter_version = await get_tool_version('python -c "import sys; print(sys.version)"')
+        venv_cache_key = hash_inputs([req_path], interpreter_version)
+        # Hold the entry until STEP 6 has committed it, so concurrent jobs never build it twice.
+        # Only a lock this job has acquired goes into ctx: a job cancelled while waiting owns nothing
+        venv_lock = venv_cache.lock(venv_cache_key)
+        await venv_lock.acquire()
+        ctx["venv_lock"] = venv_lock
+        # The workspace links to the entry, so it must outlive the job's services
+        venv_cache.lease(venv_cache_key, ctx["job_id"])
+        cached_venv = venv_cache.lookup(venv_cache_key)
+        if cached_venv and link_directory(cached_venv, venv_dir):
+            venv_cache_hit = True
+            release_lock(ctx, "venv_lock")
+            await log.send_text(f"Reusing cached virtual environment {venv_cache_key} (requirements unchanged)")
+    except Exception as e:
+        venv_cache_key = None
+        venv_cache.release(ctx["job_id"])
+        await log.send_text(f"Warning: Virtual environment cache unavailable: {str(e)}")
+    
+    # Create virtual environment
+    if not venv_cache_hit:
+        try:
+            async def forward(label, text):
+                await log.send_text(text)
+            
+            # Build new environments inside the cache so they can be reused by later runs
+            venv_target = "venv"
+            if venv_cache_key:
+                cache_entry = venv_cache.prepare(venv_cache_key, ctx["job_id"])
+                if cache_entry is None:
+                    await log.send_text("Another job is still using an unfinished environment for these requirements; building a private one")
+                if cache_entry and link_directory(cache_entry, venv_dir):
+                    venv_target = cache_entry
+                else:
+                    venv_cache_key = None
+                    venv_cache.release(ctx["job_id"])
             
-            # Try system command first (more reliable with permissions)
-            result = os.system(clone_cmd)
+            # A pre-created template only has to be moved into place
+            if await venv_pool.take(os.path.join(backend_dir, venv_target)):
+                returncode, tail = 0, []
+                await log.send_text("Took a pre-created virtual environment from the pool")
+            else:
+                returncode, tail = await stream_command(f'python -m venv "{venv_target}"', backend_dir, forward)
             
-            if result == 0 and os.path.exists(repo_path) and os.listdir(repo_path):
-                clone_success = True
-                actual_repo_path = repo_path
-                await websocket.send_text("Repository cloned successfully via system command!")
+            if returncode == 0:
+                venv_created = True
+                await log.send_text("Virtual environment created successfully")
             else:
-                await websocket.send_text("Git system command failed. Trying subprocess approach...")
-                
-                # Try with subprocess
-                import subprocess
-                process = subprocess.Popen(
-                    ["git", "clone", "--depth", "1", "https://github.com/AmruthaYalla04/aichatbot.git", repo_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-                _, stderr = process.communicate()
+                stderr_text = "\n".join(tail) if tail else "No error message"
+                await log.send_text(f"Error creating virtual environment: {stderr_text}")
+                await log.send_text("Will try to continue with system Python")
+        except Exception as e:
+            await log.send_text(f"Error creating virtual environment: {str(e)}")
+            await log.send_text("Will try to continue with system Python")
+    
+    # Verify venv was created
+    scripts_dir = os.path.join(venv_dir, "Scripts" if platform.system() == "Windows" else "bin")
+    if os.path.exists(venv_dir) and os.path.exists(scripts_dir):
+        venv_created = True
+        await log.send_text("Virtual environment verified")
+    else:
+        venv_created = False
+        await log.send_text("Virtual environment not found or incomplete")
+        
+    await log.send_text("✅ STEP 5 COMPLETE: Virtual environment setup")
+    
+    ctx["venv_dir"] = venv_dir
+    ctx["venv_created"] = venv_created
+    ctx["venv_cache_key"] = venv_cache_key
+    ctx["venv_cache_hit"] = venv_cache_hit
+    return True
+
+async def step_install_backend_deps(log, ctx):
+    """Install the backend requirements into the virtual environment"""
+    backend_dir = ctx["backend_dir"]
+    venv_dir = ctx["venv_dir"]
+    venv_created = ctx["venv_created"]
+    venv_cache_key = ctx["venv_cache_key"]
+    venv_cache_hit = ctx["venv_cache_hit"]
+    
+    # STEP 6: Install dependencies
+    await log.send_text("STEP 6: Installing Python dependencies...")
+    
+    # Determine paths for activation and pip
+    if platform.system() == "Windows":
+        if venv_created:
+            activate_cmd = os.path.join(venv_dir, "Scripts", "activate.bat")
+            pip_cmd = os.path.join(venv_dir, "Scripts", "pip.exe")
+            python_cmd = os.path.join(venv_dir, "Scripts", "python.exe")
+            # Fix the pip install command - use full path to pip
+            pip_command = lambda args: f'cmd /c "{activate_cmd} && {pip_cmd} {args}"'
+        else:
+            pip_cmd = "pip"
+            python_cmd = "python"
+            pip_command = lambda args: f"pip {args}"
+    else:
+        if venv_created:
+            activate_cmd = os.path.join(venv_dir, "bin", "activate")
+            pip_cmd = os.path.join(venv_dir, "bin", "pip")
+            python_cmd = os.path.join(venv_dir, "bin", "python")
+            # Use bash to activate the environment and run pip
+            pip_command = lambda args: f"bash -c 'source \"{activate_cmd}\" && pip {args}'"
+        else:
+            pip_cmd = "pip"
+            python_cmd = "python"
+            pip_command = lambda args: f"pip {args}"
+    install_cmd = pip_command("install -r requirements.txt")
+    deps_installed = False
+    
+    # A resume that restored STEP 5 skipped taking the lock on the cache entry this installs into
+    if venv_created and venv_cache_key and not venv_cache_hit and "venv_lock" not in ctx:
+        venv_lock = venv_cache.lock(venv_cache_key)
+        await venv_lock.acquire()
+        ctx["venv_lock"] = venv_lock
+    
+    # Run the installation command
+    try:
+        # Install dependencies with better error handling
+        try:
+            if venv_cache_hit:
+                deps_installed = True
+                await log.send_text("Dependencies already installed in cached environment. Skipping pip install.")
+            else:
+                # Install offline from prebuilt wheels so reinstalls skip the network and compilers
+                installed = False
+                if venv_created:
+                    try:
+                        await install_from_wheelhouse(log, backend_dir, pip_command)
+                        installed = True
+                    except Exception as e:
+                        await log.send_text(f"Wheelhouse install failed, installing from the package index instead: {str(e)}")
+                if not installed:
+                    await log.send_text(f"Installing dependencies using command: {install_cmd}")
+                    await run_command_with_status(log, install_cmd, backend_dir)
+                deps_installed = True
+                await log.send_text("Dependencies installed successfully")
                 
-                if process.returncode == 0 and os.path.exists(repo_path) and os.listdir(repo_path):
-                    clone_success = True
-                    actual_repo_path = repo_path
-                    await websocket.send_text("Repository cloned successfully via subprocess!")
-                else:
-                    stderr_text = stderr.decode() if stderr else "No error message"
-                    await websocket.send_text(f"Git clone failed: {stderr_text}")
+                # Only environments with a clean install are offered to later runs
+                if venv_created and venv_cache_key:
+                    await venv_cache.commit(venv_cache_key)
+                    await log.send_text(f"Cached virtual environment as {venv_cache_key}")
         except Exception as e:
-            await websocket.send_text(f"Error during git clone: {str(e)}")
+            await log.send_text(f"Error with primary install method: {str(e)}")
             
-        # Second attempt: ZIP download if git failed
-        if not clone_success:
-            await websocket.send_text("Git clone failed. Trying ZIP download method...")
-            try:
-                import requests
-                import zipfile
-                
-                # Download the ZIP file
-                zip_url = "https://github.com/AmruthaYalla04/aichatbot/archive/refs/heads/main.zip"
-                zip_path = os.path.join(work_dir, "repo.zip")
-                
-                await websocket.send_text(f"Downloading from {zip_url}...")
-                response = requests.get(zip_url)
-                
-                if response.status_code == 200:
-                    with open(zip_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    await websocket.send_text("Download complete. Extracting ZIP...")
-                    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                        zip_ref.extractall(work_dir)
-                        
-                    # Remove the ZIP file
-                    os.remove(zip_path)
-                    
-                    # Use the extracted directory
-                    extracted_dir = os.path.join(work_dir, "aichatbot-main")
-                    if os.path.exists(extracted_dir) and os.listdir(extracted_dir):
-                        clone_success = True
-                        actual_repo_path = extracted_dir
-                        await websocket.send_text(f"Repository downloaded and extracted to {actual_repo_path}")
-                    else:
-                        await websocket.send_text("ZIP extraction completed but directory is empty or not found")
-                else:
-                    await websocket.send_text(f"Failed to download ZIP: HTTP status code {response.status_code}")
-            except Exception as e:
-                await websocket.send_text(f"Error during ZIP download: {str(e)}")
-        
-        # Failure check - if both methods failed, we cannot continue
-        if not clone_success:
-            await websocket.send_text("❌ ERROR: All repository download methods failed.")
-            await websocket.send_text("Cannot proceed without repository files.")
-            return
+            # Try an alternate approach if the first one fails
+            if platform.system() == "Windows" and venv_created:
+                alt_cmd = ".\\venv\\Scripts\\activate && pip install -r requirements.txt"
+                await log.send_text(f"Trying alternate install method: {alt_cmd}")
+                try:
+                    await run_command_with_status(log, alt_cmd, backend_dir)
+                    deps_installed = True
+                    await log.send_text("Alternative installation method completed")
+                except Exception as alt_e:
+                    await log.send_text(f"Alternative installation also failed: {str(alt_e)}")
             
-        await websocket.send_text("✅ STEP 2 COMPLETE: Repository downloaded successfully")
+            # Final fallback to just install the core packages
+            if not deps_installed:
+                await log.send_text("Installing core packages directly...")
+                try:
+                    await run_command_with_status(log, pip_command("install fastapi uvicorn websockets"), backend_dir)
+                except Exception as core_e:
+                    await log.send_text(f"Installing core packages failed: {str(core_e)}")
+        
+    except Exception as e:
+        await log.send_text(f"Error during dependency installation process: {str(e)}")
+        # We'll continue anyway and hope the basic packages are already installed
+
+    release_lock(ctx, "venv_lock")
+    await log.send_text("✅ STEP 6 COMPLETE: Dependency installation process finished")
+    
+    ctx["backend_deps_installed"] = deps_installed
+    return True
+
+async def step_start_backend(log, ctx):
+    """Start the backend server and wait for it to come up"""
+    backend_dir = ctx["backend_dir"]
+    backend_port = ctx["backend_port"]
+    
+    # STEP 7: Start backend server with more robust approach
+    await log.send_text(f"STEP 7: Starting backend server on port {backend_port}...")
+
+    # Verify main.py exists
+    main_path = os.path.join(backend_dir, "main.py")
+    if not os.path.exists(main_path):
+        await log.send_text("main.py not found. Creating a basic one...")
+        with open(main_path, "w") as f:
+            f.write("""from fastapi import FastAPI\n\napp = FastAPI()\n\n@app.get("/")\ndef read_root():\n    return {"message": "Hello from AI Chatbot"}\n""")
+
+    # Run uvicorn from the virtual environment when there is one
+    if platform.system() == "Windows":
+        venv_python = os.path.join(ctx["venv_dir"], "Scripts", "python.exe")
+    else:
+        venv_python = os.path.join(ctx["venv_dir"], "bin", "python")
+    python_cmd = venv_python if os.path.exists(venv_python) else "python"
+
+    try:
+        # The supervisor owns the process from here on (see /services)
+        await log.send_text("Starting backend server...")
+        service = await launch_service(
+            ctx["job_id"], "backend",
+            [python_cmd, "-m", "uvicorn", "main:app", "--reload", "--host", "0.0.0.0", "--port", str(backend_port)],
+            backend_dir, backend_port
+        )
+        await log.send_text(f"Backend process started (service {service['id']}, pid {service['pid']})")
         
-        # STEP 3: Navigate to chatbot directory if it exists
-        await websocket.send_text("STEP 3: Checking for chatbot directory...")
-        chatbot_path = os.path.join(actual_repo_path, "chatbot")
+        # Poll until the server answers instead of waiting a fixed time
+        await log.send_text("Waiting for backend server to initialize...")
+        backend_running = await wait_until_ready(log, "Backend", f"http://localhost:{backend_port}", BACKEND_READY_TIMEOUT)
         
-        if os.path.exists(chatbot_path) and os.path.isdir(chatbot_path):
-            base_dir = chatbot_path
-            await websocket.send_text(f"Found chatbot directory at {chatbot_path}")
+        # Only report the backend as running once it has actually answered
+        update_job_status(ctx["job_id"], backend_running=backend_running)
+        if backend_running:
+            await log.send_text("✅ STEP 7 COMPLETE: Backend is now running")
         else:
-            base_dir = actual_repo_path
-            await websocket.send_text(f"No chatbot directory found. Using repository root: {actual_repo_path}")
+            await log.send_text("⚠️ STEP 7 COMPLETE: Backend started but is not responding yet")
         
-        await websocket.send_text("✅ STEP 3 COMPLETE: Base directory set to " + base_dir)
+    except Exception as e:
+        await log.send_text(f"Error starting backend: {str(e)}")
+        await log.send_text("Continuing with frontend setup...")
+    
+    return True
+
+async def step_locate_frontend(log, ctx):
+    """Find the frontend directory in the checkout"""
+    base_dir = ctx["base_dir"]
+    
+    # STEP 8: Navigate to frontend directory
+    await log.send_text("STEP 8: Setting up frontend directory...")
+    frontend_dir = os.path.join(base_dir, "frontend")
+    
+    if not os.path.exists(frontend_dir):
+        await log.send_text("❌ ERROR: Frontend directory not found. Cannot continue.")
+        return False
+    
+    await log.send_text(f"Frontend directory found at {frontend_dir}")
+    await log.send_text("✅ STEP 8 COMPLETE: Frontend directory located")
+    
+    ctx["frontend_dir"] = frontend_dir
+    return True
+
+async def step_install_frontend_deps(log, ctx):
+    """Install frontend dependencies, reusing the node_modules store"""
+    frontend_dir = ctx["frontend_dir"]
+    
+    # STEP 9: Install frontend dependencies
+    await log.send_text("STEP 9: Installing frontend dependencies with npm...")
+    
+    # Verify package.json exists
+    pkg_path = os.path.join(frontend_dir, "package.json")
+    if not os.path.exists(pkg_path):
+        await log.send_text("package.json not found. Creating a basic one...")
+        with open(pkg_path, "w") as f:
+            f.write("""{
+  "name": "chatbot-frontend",
+  "version": "0.1.0",
+  "private": true,
+  "dependencies": {
+    "react": "^17.0.2",
+    "react-dom": "^17.0.2",
+    "react-scripts": "5.0.2"
+  },
+  "scripts": {
+    "start": "react-scripts start",
+    "build": "react-scripts build"
+  },
+  "browserslist": {
+    "production": [">0.2%", "not dead", "not op_mini all"],
+    "development": ["last 1 chrome version", "last 1 firefox version", "last 1 safari version"]
+  }
+}""")
+
+    # Restore node_modules from the store when package-lock.json hasn't changed
+    node_modules_key = None
+    node_modules_hit = False
+    try:
+        node_modules_key, node_modules_hit = await restore_node_modules(log, frontend_dir)
+    except Exception as e:
+        await log.send_text(f"Warning: node_modules cache unavailable: {str(e)}")
+
+    # Install npm dependencies with improved error handling
+    deps_installed = False
+    try:
+        if node_modules_hit:
+            deps_installed = True
+            await log.send_text("Dependencies restored from cache. Skipping npm install.")
+        else:
+            await log.send_text("Running NPM install...")
+            npm_result = await run_command_with_status(log, "npm install", frontend_dir)
+            deps_installed = True
+            await log.send_text("Frontend dependencies installed successfully")
+            if node_modules_key:
+                await store_node_modules(log, frontend_dir, node_modules_key)
+    except Exception as e:
+        await log.send_text(f"Error during npm install: {str(e)}")
+        if platform.system() == "Windows":
+            await log.send_text("Trying alternate install method...")
+            try:
+                # Try once more through a fresh cmd shell
+                await run_command_with_status(log, "cmd /c npm install", frontend_dir)
+                deps_installed = True
+                await log.send_text("Alternate npm install completed")
+            except Exception as alt_e:
+                await log.send_text(f"Alternative npm install also failed: {str(alt_e)}")
+                await log.send_text("Will attempt to continue anyway...")
+        else:
+            await log.send_text("Will attempt to continue anyway...")
+
+    await log.send_text("✅ STEP 9 COMPLETE: Frontend dependencies installation finished")
+    
+    ctx["frontend_deps_installed"] = deps_installed
+    return True
+
+async def step_start_frontend(log, ctx):
+    """Start the frontend server"""
+    frontend_dir = ctx["frontend_dir"]
+    frontend_port = ctx["frontend_port"]
+    
+    # STEP 10: Start frontend server with more robust approach
+    await log.send_text(f"STEP 10: Starting frontend server on port {frontend_port}...")
+
+    # Make sure backend is actually running before starting frontend
+    if not ctx["status"]["backend_running"]:
+        await log.send_text("⚠️ Warning: Backend may not be running. Frontend may not work correctly.")
+
+    # Start the frontend
+    try:
+        await log.send_text("Starting frontend server...")
+        # npm is a .cmd script on Windows, so resolve it to a full path first
+        service = await launch_service(
+            ctx["job_id"], "frontend", [shutil.which("npm") or "npm", "start"], frontend_dir, frontend_port,
+            env={"PORT": str(frontend_port), "BROWSER": "none"}
+        )
+        await log.send_text(f"Frontend process started (service {service['id']}, pid {service['pid']})")
         
-        # STEP 4: Navigate to backend directory
-        await websocket.send_text("STEP 4: Locating backend directory...")
-        backend_dir = os.path.join(base_dir, "backend")
+        # Wait for frontend to initialize
+        await log.send_text("Waiting for frontend server to initialize...")
+        if not await wait_until_ready(log, "Frontend", f"http://localhost:{frontend_port}", FRONTEND_READY_TIMEOUT):
+            await log.send_text("❌ ERROR: Frontend server did not become ready. Setup process completed with errors.")
+            return False
         
-        # Strict error checking - fail immediately if backend dir not found
-        if not os.path.exists(backend_dir):
-            await websocket.send_text("❌ ERROR: Backend directory not found in cloned repository!")
-            await websocket.send_text("Repository structure is invalid. Cannot continue.")
-            return
-            
-        await websocket.send_text(f"Backend directory found at {backend_dir}")
-        await websocket.send_text("✅ STEP 4 COMPLETE: Backend directory located")
+        # Mark frontend as running
+        update_job_status(ctx["job_id"], frontend_running=True)
+        await log.send_text("✅ STEP 10 COMPLETE: Frontend server is running")
         
-        # STEP 5: Create virtual environment
-        await websocket.send_text("STEP 5: Creating Python virtual environment...")
+        # Final success message with access URL
+        await log.send_text("\n🎉 SETUP COMPLETE! Both services are now running.")
+        await log.send_text(f"\n✅ Backend API: http://localhost:{ctx['backend_port']}")
+        await log.send_text(f"✅ Frontend UI: http://localhost:{frontend_port}")
+        await log.send_text("\n[SUCCESS] You can now click the 'Access Application' button to open the application.")
         
-        venv_dir = os.path.join(backend_dir, "venv")
-        # Remove existing venv if it exists
-        if os.path.exists(venv_dir):
-            await websocket.send_text("Removing existing virtual environment...")
+    except Exception as e:
+        await log.send_text(f"Error starting frontend: {str(e)}")
+        await log.send_text("Setup process completed with errors.")
+        return False
+    
+    return True
+
+# Setup as a dependency graph: (name, step, dependencies, branch tag).
+# The backend and frontend branches only share the checkout, so they run concurrently.
+SETUP_PIPELINE = [
+    ("prepare", step_prepare_workspace, [], None),
+    ("clone", step_clone_repository, ["prepare"], None),
+    ("base_dir", step_locate_base_dir, ["clone"], None),
+    ("backend_dir", step_locate_backend, ["base_dir"], "backend"),
+    ("venv", step_create_venv, ["backend_dir"], "backend"),
+    ("backend_deps", step_install_backend_deps, ["venv"], "backend"),
+    ("start_backend", step_start_backend, ["backend_deps"], "backend"),
+    ("frontend_dir", step_locate_frontend, ["base_dir"], "frontend"),
+    ("frontend_deps", step_install_frontend_deps, ["frontend_dir"], "frontend"),
+    ("start_frontend", step_start_frontend, ["frontend_deps", "start_backend"], "frontend"),
+]
+
+def requirements_file(ctx):
+    return [os.path.join(ctx["backend_dir"], "requirements.txt")]
+
+def package_files(ctx):
+    return [os.path.join(ctx["frontend_dir"], name) for name in ("package.json", "package-lock.json")]
+
+# What each step's checkpoint records: (context keys the step sets, function returning the
+# files it reads, service it starts, context key that is False when the step carried on past
+# a failed command). A checkpoint is stale once those files change, a directory it recorded
+# is gone or its service has stopped; a step that carried on past a failure is recorded as
+# failed, so a resume runs it again.
+SETUP_CHECKPOINTS = {
+    "prepare": (["repo_path"], None, None, None),
+    "clone": (["repo_dir"], None, None, None),
+    "base_dir": (["base_dir"], None, None, None),
+    "backend_dir": (["backend_dir"], None, None, None),
+    "venv": (["venv_dir", "venv_created", "venv_cache_key", "venv_cache_hit"], requirements_file, None, "venv_created"),
+    "backend_deps": ([], requirements_file, None, "backend_deps_installed"),
+    "start_backend": ([], None, "backend", None),
+    "frontend_dir": (["frontend_dir"], None, None, None),
+    "frontend_deps": ([], package_files, None, "frontend_deps_installed"),
+    "start_frontend": ([], None, "frontend", None),
+}
+
+def checkpoint_path(ctx, name):
+    return os.path.join(ctx["work_dir"], ".checkpoints", f"{name}.json")
+
+def checkpoint_inputs(ctx, name, checkpoint):
+    """Hash of everything a step's outcome depends on besides its dependencies"""
+    input_files = checkpoint[1](ctx) if checkpoint[1] else []
+    return hash_inputs([path for path in input_files if os.path.exists(path)], name, ctx["repo_url"], ctx["ref"])
+
+def write_checkpoint(ctx, name, checkpoint, ok):
+    """Record a finished step's status, inputs and outputs in the workspace"""
+    path = checkpoint_path(ctx, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    record = {
+        "step": name,
+        "status": "done" if ok else "failed",
+        "inputs": checkpoint_inputs(ctx, name, checkpoint),
+        "outputs": {key: ctx.get(key) for key in checkpoint[0]},
+        "finished": time.time(),
+    }
+    with open(path + ".tmp", "w") as f:
+        json.dump(record, f)
+    os.replace(path + ".tmp", path)
+
+def restore_checkpoint(ctx, name, checkpoint):
+    """Return the outputs of a step's checkpoint if it is still valid, otherwise None"""
+    try:
+        with open(checkpoint_path(ctx, name)) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("status") != "done" or record.get("inputs") != checkpoint_inputs(ctx, name, checkpoint):
+        return None
+    outputs = record.get("outputs", {})
+    if any(isinstance(value, str) and os.path.isabs(value) and not os.path.exists(value) for value in outputs.values()):
+        return None
+    if checkpoint[2]:
+        service = services.get(f"{ctx['job_id']}-{checkpoint[2]}")
+        if service is None or service["state"] != "running":
+            return None
+    return outputs
+
+async def run_pipeline(log, ctx, pipeline, checkpoints=None):
+    """Run steps as soon as their dependencies have finished.
+
+    Returns {name: "done" | "failed" | "skipped"}; step durations go to ctx["timings"] and
+    the resources used by each step's subprocesses to ctx["usage"]. With checkpoints (see
+    SETUP_CHECKPOINTS), every step records a checkpoint in the workspace, and a step whose
+    dependencies were all restored is restored too if its own checkpoint is still valid.
+    """
+    results = {}
+    restored = set()
+    timings = ctx.setdefault("timings", {})
+    usage = ctx.setdefault("usage", {})
+    tasks = {}
+
+    async def run_step(name, step, dependencies, branch):
+        if dependencies:
+            await asyncio.gather(*(tasks[dependency] for dependency in dependencies))
+        step_log = TaggedLog(log, branch) if branch else log
+        if any(results[dependency] != "done" for dependency in dependencies):
+            results[name] = "skipped"
+            await step_log.send_text(f"Skipping {name}: a step it depends on did not complete")
+            return
+        checkpoint = (checkpoints or {}).get(name)
+        if checkpoint and restored.issuperset(dependencies):
+            outputs = restore_checkpoint(ctx, name, checkpoint)
+            if outputs is not None:
+                ctx.update(outputs)
+                with trace_span(f"step.{name}", branch=branch, restored=True):
+                    pass
+                timings[name] = 0.0
+                restored.add(name)
+                results[name] = "done"
+                await step_log.send_text(f"Reusing the checkpoint of {name} from an earlier run")
+                return
+        started = time.monotonic()
+        # Each step runs in its own task, so commands it runs are charged to it alone
+        usage[name] = new_usage()
+        step_usage.set(usage[name])
+        with trace_span(f"step.{name}", branch=branch) as span:
             try:
-                shutil.rmtree(venv_dir, ignore_errors=True)
+                ok = await step(step_log, ctx)
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
-                await websocket.send_text(f"Warning: Could not remove existing venv: {str(e)}")
-        
-        # Create virtual environment
-        venv_created = False
-        try:
-            # Use subprocess directly for better error capture
-            import subprocess
-            process = subprocess.Popen(
-                ["python", "-m", "venv", "venv"],
-                cwd=backend_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            _, stderr = process.communicate()
-            
-            if process.returncode == 0:
-                venv_created = True
-                await websocket.send_text("Virtual environment created successfully")
-            else:
-                stderr_text = stderr.decode() if stderr else "No error message"
-                await websocket.send_text(f"Error creating virtual environment: {stderr_text}")
-                await websocket.send_text("Will try to continue with system Python")
-        except Exception as e:
-            await websocket.send_text(f"Error creating virtual environment: {str(e)}")
-            await websocket.send_text("Will try to continue with system Python")
+                await step_log.send_text(f"❌ Error in {name}: {str(e)}")
+                span["attributes"]["error"] = str(e)
+                ok = False
+            if not ok:
+                span["status"] = "failed"
+            span["attributes"].update(usage_attributes(usage[name]))
+        timings[name] = time.monotonic() - started
+        usage[name]["wall_seconds"] = timings[name]
+        results[name] = "done" if ok else "failed"
+        if checkpoint:
+            if ok and checkpoint[3] and not ctx.get(checkpoint[3], True):
+                ok = False
+                await step_log.send_text(f"{name} carried on after a failed command; a resume will run it again")
+            try:
+                write_checkpoint(ctx, name, checkpoint, ok)
+            except OSError as e:
+                await step_log.send_text(f"Warning: Could not record a checkpoint for {name}: {str(e)}")
+
+    for name, step, dependencies, branch in pipeline:
+        tasks[name] = asyncio.create_task(run_step(name, step, dependencies, branch))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        # A disconnect (or cancellation) stops every branch, not just the one that noticed
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return results
+
+# === Job engine ===
+
+# Every submitted repository becomes a job with its own id, workspace, status and log.
+# A fixed pool of workers takes jobs off the queue, so at most JOB_WORKERS run at once.
+jobs = {}
+job_queue = None
+job_workers = []
+
+def create_job(repo_url, ref=None):
+    """Register a job and queue it for the worker pool"""
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "id": job_id,
+        "repo_url": repo_url,
+        "ref": ref,
+        "state": "queued",
+        "created": time.time(),
+        "started": None,
+        "finished": None,
+        "workspace": os.path.join(JOBS_DIR, job_id),
+        "status": {"backend_running": False, "frontend_running": False, "backend_port": None, "frontend_port": None},
+        "results": {},
+        "timings": {},
+        "usage": {},
+        "trace": new_trace(job_id),
+        "error": None,
+        # Bumped on every state or status change; see touch_job
+        "version": 0,
+        "changed": asyncio.Event(),
+        "log": JobLog(LogStore(os.path.join(LOG_DIR, f"{job_id}.log"))),
+        "done": asyncio.Event(),
+        "task": None,
+    }
+    jobs[job_id] = job
+    job_queue.put_nowait(job_id)
+    prune_jobs()
+    return job
+
+def find_active_job(repo_url, ref):
+    """The most recent queued or running job for the same repository and ref, if any"""
+    active = [
+        job for job in jobs.values()
+        if job["state"] in ("queued", "running") and job["repo_url"] == repo_url and job["ref"] == ref
+    ]
+    return max(active, key=lambda job: job["created"], default=None)
+
+def job_summary(job):
+    """JSON-safe view of a job"""
+    return {key: job[key] for key in (
+        "id", "repo_url", "ref", "state", "created", "started", "finished",
+        "workspace", "status", "results", "timings", "usage", "error", "version",
+    )}
+
+def get_job_or_404(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def prune_jobs():
+    """Forget the oldest finished jobs beyond JOB_HISTORY, stopping their services and
+    removing their workspaces"""
+    finished = sorted(
+        (job for job in jobs.values() if job["done"].is_set()),
+        key=lambda job: job["created"]
+    )
+    for job in finished[:max(0, len(finished) - JOB_HISTORY)]:
+        jobs.pop(job["id"], None)
+        touch_job(job)
+        job["log"].store.remove()
+        asyncio.create_task(retire_job(job))
+
+async def retire_job(job):
+    """Stop and forget a pruned job's services, then free its ports and workspace"""
+    for service in [service for service in services.values() if service["job_id"] == job["id"]]:
+        await stop_service(service)
+        services.pop(service["id"], None)
+    port_allocator.release(job["id"])
+    venv_cache.release(job["id"])
+    await asyncio.to_thread(remove_directory, job["workspace"])
+
+async def stop_replaced_services(log, job):
+    """Stop the services of earlier finished jobs for the same repository and ref.
+
+    A new run replaces the previous one instead of starting another copy next to it; the
+    earlier job is kept and can be resumed, which starts its services again.
+    """
+    for other in list(jobs.values()):
+        if other is job or not other["done"].is_set():
+            continue
+        if other["repo_url"] != job["repo_url"] or other["ref"] != job["ref"]:
+            continue
+        running = [service for service in services.values() if service["job_id"] == other["id"] and service["state"] == "running"]
+        if running:
+            await log.send_text(f"Stopping the services of earlier job {other['id']} for the same repository...")
+            for service in running:
+                await stop_service(service)
+
+def touch_job(job):
+    """Bump a job's version and wake everyone waiting for it to change"""
+    job["version"] += 1
+    job["changed"].set()
+    job["changed"] = asyncio.Event()
+
+def update_job_status(job_id, **changes):
+    """Update a job's status flags and ports, notifying status streams"""
+    job = jobs.get(job_id)
+    if job is not None:
+        job["status"].update(changes)
+        touch_job(job)
+
+def status_snapshot(job):
+    """What status streams send: the job's state and status with its version"""
+    return {"job_id": job["id"], "version": job["version"], "state": job["state"], "error": job["error"], **job["status"]}
+
+async def wait_for_change(job, since, timeout):
+    """Wait until the job's version is past since, or timeout; True if it is"""
+    changed = job["changed"]
+    if job["version"] > since:
+        return True
+    try:
+        await asyncio.wait_for(changed.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return job["version"] > since
+
+def services_running(job):
+    return job["status"]["backend_running"] or job["status"]["frontend_running"]
+
+async def run_job(job):
+    """Run the setup pipeline for one job inside its own workspace"""
+    log = job["log"]
+    job["state"] = "running"
+    job["started"] = time.time()
+    touch_job(job)
+    ctx = {
+        "job_id": job["id"],
+        "work_dir": job["workspace"],
+        "repo_url": job["repo_url"],
+        "repo_name": repo_name_for(job["repo_url"]),
+        "ref": job["ref"],
+        "status": job["status"],
+    }
+    try:
+        # Make the explanation clearer
+        await log.send_text(f"Starting repository clone and setup for {job['repo_url']}" + (f" ({job['ref']})" if job["ref"] else "") + "...")
+        await stop_replaced_services(log, job)
+        backend_port, frontend_port = port_allocator.lease(job["id"])
+        update_job_status(job["id"], backend_port=backend_port, frontend_port=frontend_port)
+        ctx["backend_port"] = backend_port
+        ctx["frontend_port"] = frontend_port
+        await log.send_text("Note: Main application runs on ports 3002/8002")
+        await log.send_text(f"Note: Cloned repository will run on ports {frontend_port}/{backend_port}")
         
-        # Verify venv was created
-        scripts_dir = os.path.join(venv_dir, "Scripts" if platform.system() == "Windows" else "bin")
-        if os.path.exists(venv_dir) and os.path.exists(scripts_dir):
-            venv_created = True
-            await websocket.send_text("Virtual environment verified")
-        else:
-            venv_created = False
-            await websocket.send_text("Virtual environment not found or incomplete")
-            
-        await websocket.send_text("✅ STEP 5 COMPLETE: Virtual environment setup")
+        # Every job gets its own working directory so concurrent runs never collide
+        os.makedirs(job["workspace"], exist_ok=True)
+        await log.send_text(f"Created working directory: {job['workspace']}")
         
-        # STEP 6: Install dependencies
-        await websocket.send_text("STEP 6: Installing Python dependencies...")
+        # Run STEPs 1-10; the backend and frontend branches proceed in parallel
+        started = time.monotonic()
+        current_trace.set(job["trace"])
+        with trace_span("job", job_id=job["id"], repo_url=job["repo_url"], ref=job["ref"]) as span:
+            job["results"] = await run_pipeline(log, ctx, SETUP_PIPELINE, SETUP_CHECKPOINTS)
+            span["attributes"]["results"] = job["results"]
+        job["timings"] = ctx["timings"]
+        job["usage"] = ctx["usage"]
+        elapsed = time.monotonic() - started
         
-        # Determine paths for activation and pip
-        if platform.system() == "Windows":
-            if venv_created:
-                activate_cmd = os.path.join(venv_dir, "Scripts", "activate.bat")
-                pip_cmd = os.path.join(venv_dir, "Scripts", "pip.exe")
-                python_cmd = os.path.join(venv_dir, "Scripts", "python.exe")
-                # Fix the pip install command - use full path to pip
-                install_cmd = f'cmd /c "{activate_cmd} && {pip_cmd} install -r requirements.txt"'
+        incomplete = [name for name, _, _, _ in SETUP_PIPELINE if job["results"].get(name) != "done"]
+        if incomplete:
+            await log.send_text(f"⚠️ Setup finished with incomplete steps: {', '.join(incomplete)}")
+        step_times = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in ctx["timings"].items())
+        await log.send_text(f"Total setup time: {elapsed:.1f}s ({step_times})")
+        job["state"] = "failed" if incomplete else "succeeded"
+    except asyncio.CancelledError:
+        job["state"] = "cancelled"
+        raise
+    except Exception as e:
+        job["state"] = "failed"
+        job["error"] = str(e)
+        print(f"Job {job['id']} failed: {str(e)}")
+        await log.send_text(f"Error: {str(e)}")
+    finally:
+        for name in [name for name in ctx if name.endswith("_lock")]:
+            release_lock(ctx, name)
+        # Services that came up keep their ports until the job is removed
+        if not services_running(job):
+            port_allocator.release(job["id"])
+        job["finished"] = time.time()
+        job["done"].set()
+        touch_job(job)
+        # Only the odd service message arrives after this; don't hold the files open for it
+        log.store.close()
+
+async def job_worker():
+    """Take jobs off the queue one at a time"""
+    while True:
+        job_id = await job_queue.get()
+        try:
+            job = jobs.get(job_id)
+            if job is None or job["state"] != "queued":
+                continue
+            # Run the job in its own task so cancelling it leaves the worker alive
+            job["task"] = asyncio.create_task(run_job(job))
+            await asyncio.wait([job["task"]])
+        except Exception as e:
+            print(f"Job worker error: {str(e)}")
+        finally:
+            job_queue.task_done()
+
+def resume_job(job):
+    """Queue a finished job again in its own workspace; valid checkpoints let it skip ahead"""
+    if not job["done"].is_set():
+        raise HTTPException(status_code=409, detail=f"Job {job['id']} is still {job['state']}")
+    job.update(
+        state="queued", started=None, finished=None, results={}, timings={}, usage={},
+        error=None, done=asyncio.Event(), task=None,
+    )
+    touch_job(job)
+    job_queue.put_nowait(job["id"])
+
+async def cancel_job(job):
+    """Stop a queued or running job"""
+    if job["state"] == "queued":
+        job["state"] = "cancelled"
+        job["finished"] = time.time()
+        job["done"].set()
+        touch_job(job)
+    elif job["task"] is not None and not job["task"].done():
+        job["task"].cancel()
+        await asyncio.wait([job["task"]])
+
+async def watch_job(websocket, log, job, offset=0):
+    """Stream a job's log from line offset to a viewer until the job finishes or the viewer disconnects"""
+    job["log"].attach(log, offset)
+    done = asyncio.create_task(job["done"].wait())
+    try:
+        while not done.done():
+            # receive_text raises WebSocketDisconnect once the viewer goes away
+            receive = asyncio.create_task(websocket.receive_text())
+            await asyncio.wait([done, receive], return_when=asyncio.FIRST_COMPLETED)
+            if receive.done():
+                receive.result()
             else:
-                pip_cmd = "pip"
-                python_cmd = "python"
-                install_cmd = "pip install -r requirements.txt"
-        else:
-            if venv_created:
-                activate_cmd = os.path.join(venv_dir, "bin", "activate")
-                pip_cmd = os.path.join(venv_dir, "bin", "pip")
-                python_cmd = os.path.join(venv_dir, "bin", "python")
-                # Use bash to activate the environment and run pip
-                install_cmd = f'bash -c "source {activate_cmd} && pip install -r requirements.txt"'
+                receive.cancel()
+        # Deliver what is still queued for this viewer before the caller closes the connection
+        await job["log"].drain(log)
+    finally:
+        job["log"].detach(log)
+        done.cancel()
+
+@app.on_event("startup")
+async def start_job_workers():
+    global job_queue
+    start_trash_reaper()
+    # Jobs don't survive a restart, so neither do their logs
+    remove_directory(LOG_DIR)
+    venv_pool.refill()
+    job_queue = asyncio.Queue()
+    for _ in range(JOB_WORKERS):
+        job_workers.append(asyncio.create_task(job_worker()))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for job in list(jobs.values()):
+        await cancel_job(job)
+    for worker in job_workers:
+        worker.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    job_workers.clear()
+    venv_pool.stop()
+
+
+# === Service supervisor ===
+
+# Every service the runner launches, by id ("<job id>-backend", "<job id>-frontend", ...)
+services = {}
+
+def service_summary(service):
+    """JSON-safe view of a service"""
+    return {key: service[key] for key in (
+        "id", "job_id", "name", "command", "cwd", "port", "pid", "state",
+        "started", "exit_code", "restarts",
+    )}
+
+def get_service_or_404(service_id):
+    service = services.get(service_id)
+    if service is None:
+        raise HTTPException(status_code=404, detail=f"Service {service_id} not found")
+    return service
+
+def set_service_running(service, running):
+    """Mirror a service's state into its job's backend_running/frontend_running flag"""
+    job = jobs.get(service["job_id"])
+    if job is not None and f"{service['name']}_running" in job["status"]:
+        update_job_status(job["id"], **{f"{service['name']}_running": running})
+
+@traced("service.launch")
+async def launch_service(job_id, name, command, cwd, port=None, env=None, on_line=None):
+    """Start a long-running service in its own process group and register it.
+
+    command is an argument list, or a string to run through the shell. Output is kept in
+    a bounded tail (and passed to on_line if given). A service that is already running
+    under the same id is stopped first.
+    """
+    service_id = f"{job_id}-{name}" if job_id else f"{name}-{uuid.uuid4().hex[:8]}"
+    previous = services.get(service_id)
+    if previous is not None:
+        await stop_service(previous, release_ports=False)
+    service = {
+        "id": service_id,
+        "job_id": job_id,
+        "name": name,
+        "command": command,
+        "cwd": cwd,
+        "port": port,
+        "env": env or {},
+        "pid": None,
+        "state": "starting",
+        "started": None,
+        "exit_code": None,
+        "restarts": previous["restarts"] if previous else 0,
+        "output": collections.deque(maxlen=COMMAND_TAIL_LINES),
+        "on_line": on_line,
+        "process": None,
+        "monitor": None,
+        "stopping": False,
+    }
+    services[service_id] = service
+    await _spawn_service(service)
+    return service
+
+async def _spawn_service(service):
+    # A new session (POSIX) or process group (Windows) lets us stop everything the service spawns
+    if os.name == "nt":
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {"start_new_session": True}
+    options = dict(
+        cwd=service["cwd"],
+        env={**os.environ, **service["env"]},
+        # stdin stays open: the React dev server exits as soon as its stdin is closed
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        **group
+    )
+    if isinstance(service["command"], str):
+        process = await asyncio.create_subprocess_shell(service["command"], **options)
+    else:
+        process = await asyncio.create_subprocess_exec(*service["command"], **options)
+    service.update(process=process, pid=process.pid, state="running", started=time.time(), exit_code=None, stopping=False)
+    service["monitor"] = asyncio.create_task(_monitor_service(service, process))
+
+async def _monitor_service(service, process):
+    """Collect a service's output and record how it ended"""
+    async def forward(label, text):
+        if service["on_line"] is not None:
+            await service["on_line"](label, text)
+
+    await asyncio.gather(
+        _pump_lines(process.stdout, "stdout", forward, service["output"]),
+        _pump_lines(process.stderr, "stderr", forward, service["output"])
+    )
+    exit_code = await process.wait()
+    # A restart may already have replaced this process
+    if service["process"] is process:
+        service["exit_code"] = exit_code
+        service["state"] = "stopped" if service["stopping"] else "exited"
+        set_service_running(service, False)
+
+def signal_process_group(process, force=False):
+    """Ask a service and everything it spawned to stop, or kill them if force is set"""
+    try:
+        if os.name == "nt":
+            if force:
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
             else:
-                pip_cmd = "pip"
-                python_cmd = "python"
-                install_cmd = "pip install -r requirements.txt"
-        
-        # Run the installation command
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, OSError):
+        pass
+
+async def stop_service(service, release_ports=True):
+    """Stop a service's whole process group, escalating to a kill after SERVICE_STOP_TIMEOUT.
+
+    Once none of a finished job's services are running, its port pair is released.
+    """
+    process = service["process"]
+    service["stopping"] = True
+    if process is not None and process.returncode is None:
+        signal_process_group(process)
         try:
-            # Check if requirements.txt exists
-            req_path = os.path.join(backend_dir, "requirements.txt")
-            
-            if not os.path.exists(req_path):
-                await websocket.send_text("requirements.txt not found. Creating with basic dependencies...")
-                with open(req_path, "w") as f:
-                    f.write("fastapi==0.104.1\nuvicorn==0.24.0\nwebsockets==11.0.3\njinja2==3.1.2\naiofiles==23.2.1\n")
-            
-            # Install dependencies with better error handling
-            try:
-                await websocket.send_text(f"Installing dependencies using command: {install_cmd}")
-                await run_command_with_status(websocket, install_cmd, backend_dir)
-                await websocket.send_text("Dependencies installed successfully")
-            except Exception as e:
-                await websocket.send_text(f"Error with primary install method: {str(e)}")
-                
-                # Try an alternate approach if the first one fails
-                if platform.system() == "Windows" and venv_created:
-                    alt_cmd = f"cd /d {backend_dir} && .\\venv\\Scripts\\activate && pip install -r requirements.txt"
-                    await websocket.send_text(f"Trying alternate install method: {alt_cmd}")
-                    try:
-                        os.system(alt_cmd)
-                        await websocket.send_text("Alternative installation method completed")
-                    except Exception as alt_e:
-                        await websocket.send_text(f"Alternative installation also failed: {str(alt_e)}")
-                
-                # Final fallback to just install the core packages
-                await websocket.send_text("Installing core packages directly...")
-                if platform.system() == "Windows" and venv_created:
-                    os.system(f"cd /d {backend_dir} && .\\venv\\Scripts\\activate && pip install fastapi uvicorn websockets")
-                else:
-                    os.system(f"pip install fastapi uvicorn websockets")
-            
-        except Exception as e:
-            await websocket.send_text(f"Error during dependency installation process: {str(e)}")
-            # We'll continue anyway and hope the basic packages are already installed
-
-        await websocket.send_text("✅ STEP 6 COMPLETE: Dependency installation process finished")
-
-        # STEP 7: Start backend server with more robust approach
-        await websocket.send_text("STEP 7: Starting backend server on port 8000...")
-
-        # Verify main.py exists
-        main_path = os.path.join(backend_dir, "main.py")
-        if not os.path.exists(main_path):
-            await websocket.send_text("main.py not found. Creating a basic one...")
-            with open(main_path, "w") as f:
-                f.write("""from fastapi import FastAPI\n\napp = FastAPI()\n\n@app.get("/")\ndef read_root():\n    return {"message": "Hello from AI Chatbot"}\n""")
-
-        # Create a robust batch file for running the backend
-        backend_script = os.path.join(backend_dir, "run_backend.bat")
-        with open(backend_script, 'w') as f:
-            f.write('@echo off\n')
-            f.write('echo ===============================================\n')
-            f.write('echo Starting AI Chatbot Backend Server - Port 8000\n')
-            f.write('echo ===============================================\n\n')
-            f.write(f'cd /d "{backend_dir}"\n\n')
-            f.write('echo Activating virtual environment...\n')
-            f.write('call venv\\Scripts\\activate.bat\n\n')
-            f.write('echo Starting uvicorn server...\n')
-            f.write('python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000\n\n')
-            f.write('echo Backend server stopped. Press any key to close this window...\n')
-            f.write('pause>nul\n')
-
-        await websocket.send_text(f"Created backend starter script: {backend_script}")
+            await asyncio.wait_for(process.wait(), SERVICE_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(signal_process_group, process, True)
+            await process.wait()
+    if service["monitor"] is not None:
+        # Output pipes close with the process group; don't hang on strays that escaped it
+        await asyncio.wait([service["monitor"]], timeout=SERVICE_STOP_TIMEOUT)
+    service["state"] = "stopped"
+    set_service_running(service, False)
+
+    job_id = service["job_id"]
+    job = jobs.get(job_id)
+    if release_ports and job_id and (job is None or job["done"].is_set()):
+        if not any(other["job_id"] == job_id and other["state"] == "running" for other in services.values()):
+            port_allocator.release(job_id)
+            # A forgotten job's workspace no longer needs the cached venv it links to
+            if job is None:
+                venv_cache.release(job_id)
+
+async def restart_service(service):
+    """Stop a service and start it again with the same command and port"""
+    await stop_service(service, release_ports=False)
+    service["restarts"] += 1
+    await _spawn_service(service)
+    job = jobs.get(service["job_id"])
+    if job is not None and service["port"]:
+        # Report it as running again once it answers, like the setup steps do
+        asyncio.create_task(_wait_for_service(job["log"], service))
+
+async def _wait_for_service(log, service):
+    timeout = BACKEND_READY_TIMEOUT if service["name"] == "backend" else FRONTEND_READY_TIMEOUT
+    ready = await wait_until_ready(log, service["name"].capitalize(), f"http://localhost:{service['port']}", timeout)
+    if service["state"] == "running":
+        set_service_running(service, ready)
+
+@app.on_event("shutdown")
+async def stop_services():
+    await asyncio.gather(*(stop_service(service) for service in list(services.values())), return_exceptions=True)
+
+
+def parse_git_progress(line):
+    """Parse a git --progress line into a structured event, or return None"""
+    match = GIT_PROGRESS_RE.match(line.strip())
+    if not match:
+        return None
+    event = {
+        "phase": match.group("phase").strip(),
+        "percent": int(match.group("percent")),
+        "objects": int(match.group("current")),
+        "total_objects": int(match.group("total")),
+        "bytes": None,
+    }
+    if match.group("size"):
+        event["bytes"] = int(float(match.group("size")) * SIZE_UNITS.get(match.group("unit"), 1))
+    return event
+
+async def run_git(websocket, args, cwd=None):
+    """Run a git command without blocking the event loop, streaming --progress output as structured events.
 
+    Returns (returncode, messages) where messages are the non-progress lines git printed.
+    """
+    command = ["git"] + args
+    await websocket.send_text(f"Running: {' '.join(command)}")
+
+    with trace_span("git", command=" ".join(command), cwd=cwd) as span:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        last_progress = None
+        messages = collections.deque(maxlen=COMMAND_TAIL_LINES)
+        pending = b""
+        output_bytes = 0
+        usage = new_usage()
+        sampler = asyncio.create_task(sample_usage(process.pid, usage))
         try:
-            # Start the backend using subprocess
-            await websocket.send_text("Starting backend server...")
-            backend_proc = subprocess.Popen(
-                f'start cmd /k "{backend_script}"',
-                shell=True
-            )
-            await websocket.send_text(f"Backend process started in a new window")
-            
-            # Allow time for the server to start
-            await websocket.send_text("Waiting for backend server to initialize...")
-            for i in range(20, 0, -1):
-                await websocket.send_text(f"Backend initialization: {i} seconds remaining...")
-                await asyncio.sleep(1)
-                
-                # Check if backend is accessible
-                if i % 5 == 0 or i <= 3:
+            while True:
+                chunk = await process.stderr.read(4096)
+                if not chunk:
+                    break
+                output_bytes += len(chunk)
+                # git redraws progress lines with carriage returns, so split on both
+                pending += chunk
+                parts = re.split(rb"[\r\n]", pending)
+                pending = parts.pop()
+                for part in parts:
+                    line = part.decode(errors="replace").strip()
+                    if not line:
+                        continue
+                    event = parse_git_progress(line)
+                    if event is None:
+                        messages.append(line)
+                        continue
+                    # Only forward progress when the phase or percentage actually changes
+                    progress_key = (event["phase"], event["percent"])
+                    if progress_key != last_progress:
+                        last_progress = progress_key
+                        await websocket.send_text(f"[PROGRESS] {json.dumps(event)}")
+            if pending.strip():
+                messages.append(pending.decode(errors="replace").strip())
+
+            read_process_usage(process.pid, usage)
+            returncode = await process.wait()
+        finally:
+            sampler.cancel()
+            charge_usage(usage)
+            span["attributes"].update(output_bytes=output_bytes, **usage_attributes(usage))
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        span["attributes"]["exit_code"] = returncode
+        if returncode != 0:
+            span["status"] = "failed"
+
+    return returncode, list(messages)
+
+def is_git_checkout(path):
+    """True if path is a git working tree we can update in place"""
+    return os.path.isdir(os.path.join(path, ".git"))
+
+def repo_name_for(repo_url):
+    """Short repository name, e.g. "aichatbot" for https://github.com/AmruthaYalla04/aichatbot.git"""
+    name = repo_url.rstrip("/").split("/")[-1].split(":")[-1]
+    if name.endswith(".git"):
+        name = name[:-4]
+    return name or "repo"
+
+def zip_url_for(repo_url, ref=None):
+    """GitHub archive URL for the repository, or None for other hosts"""
+    match = re.match(r"^https://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$", repo_url)
+    if not match:
+        return None
+    archive = ref or "refs/heads/main"
+    return f"https://github.com/{match.group(1)}/{match.group(2)}/archive/{archive}.zip"
+
+def mirror_path_for(repo_url):
+    """Location of the persistent bare mirror for a repository URL"""
+    name = repo_name_for(repo_url)
+    url_hash = hashlib.sha256(repo_url.encode()).hexdigest()[:8]
+    return os.path.join(MIRROR_DIR, f"{name}-{url_hash}.git")
+
+@traced("git.mirror")
+async def update_mirror(websocket, repo_url):
+    """Create or incrementally fetch the bare mirror of repo_url, returning its path or None"""
+    mirror_path = mirror_path_for(repo_url)
+    # Jobs for the same repository share its mirror, so update it one job at a time
+    async with mirror_locks.setdefault(mirror_path, asyncio.Lock()):
+        return await _update_mirror(websocket, repo_url, mirror_path)
+
+async def _update_mirror(websocket, repo_url, mirror_path):
+    if os.path.isdir(mirror_path):
+        await websocket.send_text(f"Fetching new objects into local mirror {mirror_path}...")
+        returncode, messages = await run_git(websocket, ["--git-dir", mirror_path, "fetch", "--prune", "--progress", "origin"])
+        if returncode != 0:
+            # A stale mirror is still better than no checkout at all
+            await websocket.send_text(f"⚠️ Mirror fetch failed, using last fetched state: {' '.join(messages[-3:])}")
+        return mirror_path
+
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    await websocket.send_text(f"Creating local mirror {mirror_path}...")
+    returncode, messages = await run_git(websocket, ["clone", "--mirror", "--progress", repo_url, mirror_path])
+    if returncode != 0:
+        remove_directory(mirror_path)
+        error_text = "\n".join(messages[-20:]) if messages else "No error message"
+        await websocket.send_text(f"Git clone failed: {error_text}")
+        return None
+    return mirror_path
+
+async def clone_repository(websocket, repo_url, repo_path, ref=None):
+    """Bring repo_path up to date with ref (default branch if None) via the persistent local mirror.
+
+    Only new objects are fetched from the network, and an existing checkout is reset in
+    place so only changed files are rewritten. Dependency folders are left for the caches.
+    """
+    mirror_path = await update_mirror(websocket, repo_url)
+    if not mirror_path:
+        return False
+
+    steps = []
+    if not is_git_checkout(repo_path):
+        remove_directory(repo_path)
+        # A local clone hard-links the mirror's objects instead of copying them
+        steps.append(["clone", "--no-checkout", "--progress", mirror_path, repo_path])
+    steps += [
+        ["-C", repo_path, "fetch", "--progress", "origin", ref or "HEAD"],
+        ["-C", repo_path, "reset", "--hard", "FETCH_HEAD"],
+        ["-C", repo_path, "clean", "-fdx", "-e", "venv", "-e", "node_modules"],
+    ]
+
+    for args in steps:
+        returncode, messages = await run_git(websocket, args)
+        if returncode != 0:
+            error_text = "\n".join(messages[-20:]) if messages else "No error message"
+            await websocket.send_text(f"Git checkout failed: {error_text}")
+            return False
+
+    return os.path.exists(repo_path) and bool(os.listdir(repo_path))
+
+async def download_archive(websocket, url, dest_dir):
+    """Download a ZIP archive and extract it into dest_dir, returning the extracted top-level directory or None.
+
+    The body is streamed to a spool file in fixed-size chunks, with each write handed to a
+    worker thread while the next chunk is read, so memory stays flat regardless of archive
+    size. A ZIP's index sits at its end, so extraction starts once the spool is complete and
+    also runs in a worker thread.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, spool_path = tempfile.mkstemp(prefix=".download-", suffix=".zip", dir=dest_dir)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async with get_http_client().stream("GET", url) as response:
+                if response.status_code != 200:
+                    await websocket.send_text(f"Failed to download ZIP: HTTP status code {response.status_code}")
+                    return None
+                total_bytes = int(response.headers.get("content-length") or 0) or None
+                with trace_span("archive.download", url=url) as span:
+                    received = await _spool_response(websocket, response, spool, total_bytes)
+                    span["attributes"]["bytes"] = received
+
+        await websocket.send_text(f"Download complete ({received / (1024 * 1024):.1f} MiB). Extracting ZIP...")
+        with trace_span("archive.extract"):
+            top_level = await asyncio.to_thread(extract_archive, spool_path, dest_dir)
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    return os.path.join(dest_dir, top_level) if top_level else None
+
+async def _spool_response(websocket, response, spool, total_bytes):
+    """Write a streamed response to spool, reporting [PROGRESS] events; returns the byte count"""
+    received = 0
+    last_reported = None
+    pending_write = None
+    try:
+        async for chunk in response.aiter_bytes(ARCHIVE_CHUNK_SIZE):
+            # At most one chunk is being written while the next one arrives
+            if pending_write is not None:
+                await pending_write
+            pending_write = asyncio.ensure_future(asyncio.to_thread(spool.write, chunk))
+            received += len(chunk)
+
+            if total_bytes:
+                marker = min(100, received * 100 // total_bytes)
+            else:
+                marker = received // ARCHIVE_PROGRESS_BYTES
+            if marker != last_reported:
+                last_reported = marker
+                event = {
+                    "phase": "Downloading archive",
+                    "percent": marker if total_bytes else None,
+                    "objects": None,
+                    "total_objects": None,
+                    "bytes": received,
+                }
+                await websocket.send_text(f"[PROGRESS] {json.dumps(event)}")
+    finally:
+        if pending_write is not None:
+            await pending_write
+    return received
+
+def extract_archive(zip_path, dest_dir):
+    """Extract a ZIP archive into dest_dir and return the name of its top-level entry.
+
+    The central directory is read once, every directory is created up front, and the files
+    are split into size-balanced batches that worker threads extract through their own
+    handles on the archive (zlib releases the GIL while inflating, so threads scale).
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        members = archive.infolist()
+    if not members:
+        return None
+
+    # zipfile never creates symlinks, so a lexical check is enough to keep members inside dest_dir
+    dest_root = os.path.abspath(dest_dir)
+    directories = set()
+    files = []
+    for info in members:
+        target = os.path.normpath(os.path.join(dest_root, info.filename))
+        if not target.startswith(dest_root + os.sep):
+            raise ValueError(f"Unsafe path in archive: {info.filename}")
+        if info.is_dir():
+            directories.add(target)
+        else:
+            directories.add(os.path.dirname(target))
+            files.append((info, target))
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    # Largest files first, each onto the currently lightest batch
+    batches = [[] for _ in range(max(1, min(ARCHIVE_EXTRACT_WORKERS, len(files))))]
+    loads = [(0, index) for index in range(len(batches))]
+    for info, target in sorted(files, key=lambda item: item[0].file_size, reverse=True):
+        load, index = heapq.heappop(loads)
+        batches[index].append((info, target))
+        heapq.heappush(loads, (load + info.file_size + ARCHIVE_FILE_OVERHEAD, index))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        for future in [pool.submit(_extract_batch, zip_path, batch) for batch in batches]:
+            future.result()
+
+    return members[0].filename.split("/")[0]
+
+def _extract_batch(zip_path, batch):
+    """Write one batch of archive members, preallocating the large ones"""
+    with zipfile.ZipFile(zip_path) as archive:
+        for info, target in batch:
+            with archive.open(info) as source, open(target, "wb") as output:
+                if info.file_size >= ARCHIVE_PREALLOCATE_BYTES and hasattr(os, "posix_fallocate"):
                     try:
-                        import requests
-                        try:
-                            response = requests.get("http://localhost:8000", timeout=2)
-                            if response.status_code < 400:
-                                backend_running = True
-                                await websocket.send_text(f"✅ Backend server is running and responding on http://localhost:8000")
-                                break
-                        except requests.exceptions.RequestException:
-                            await websocket.send_text("Backend not responding yet...")
-                    except ImportError:
-                        await websocket.send_text("Cannot check backend status (requests module not available)")
-            
-            # Mark backend as running
-            repo_setup_status["backend_running"] = True
-            await websocket.send_text("✅ STEP 7 COMPLETE: Backend is now running")
-            
-        except Exception as e:
-            await websocket.send_text(f"Error starting backend: {str(e)}")
-            await websocket.send_text("Continuing with frontend setup...")
+                        os.posix_fallocate(output.fileno(), 0, info.file_size)
+                    except OSError:
+                        pass  # Not supported by this filesystem; the write still succeeds
+                shutil.copyfileobj(source, output, ARCHIVE_CHUNK_SIZE)
 
-        # STEP 8: Navigate to frontend directory
-        await websocket.send_text("STEP 8: Setting up frontend directory...")
-        frontend_dir = os.path.join(base_dir, "frontend")
-        
-        if not os.path.exists(frontend_dir):
-            await websocket.send_text("❌ ERROR: Frontend directory not found. Cannot continue.")
-            return
-        
-        await websocket.send_text(f"Frontend directory found at {frontend_dir}")
-        await websocket.send_text("✅ STEP 8 COMPLETE: Frontend directory located")
-        
-        # STEP 9: Install frontend dependencies
-        await websocket.send_text("STEP 9: Installing frontend dependencies with npm...")
-        
-        # Verify package.json exists
-        pkg_path = os.path.join(frontend_dir, "package.json")
-        if not os.path.exists(pkg_path):
-            await websocket.send_text("package.json not found. Creating a basic one...")
-            with open(pkg_path, "w") as f:
-                f.write("""{
-  "name": "chatbot-frontend",
-  "version": "0.1.0",
-  "private": true,
-  "dependencies": {
-    "react": "^17.0.2",
-    "react-dom": "^17.0.2",
-    "react-scripts": "5.0.2"
-  },
-  "scripts": {
-    "start": "react-scripts start",
-    "build": "react-scripts build"
-  },
-  "browserslist": {
-    "production": [">0.2%", "not dead", "not op_mini all"],
-    "development": ["last 1 chrome version", "last 1 firefox version", "last 1 safari version"]
-  }
-}""")
+# === Resource accounting ===
 
-        # Install npm dependencies with improved error handling
-        try:
-            await websocket.send_text("Running NPM install...")
-            npm_result = await run_command_with_status(websocket, "npm install", frontend_dir)
-            await websocket.send_text("Frontend dependencies installed successfully")
-        except Exception as e:
-            await websocket.send_text(f"Error during npm install: {str(e)}")
-            await websocket.send_text("Trying alternate install method...")
-            try:
-                # Try system command directly
-                os.system(f"cd /d {frontend_dir} && npm install")
-                await websocket.send_text("Alternate npm install completed")
-            except Exception as alt_e:
-                await websocket.send_text(f"Alternative npm install also failed: {str(alt_e)}")
-                await websocket.send_text("Will attempt to continue anyway...")
-
-        await websocket.send_text("✅ STEP 9 COMPLETE: Frontend dependencies installation finished")
-
-        # STEP 10: Start frontend server with more robust approach
-        await websocket.send_text("STEP 10: Starting frontend server on port 3000...")
-
-        # Create a reliable batch file for running the frontend
-        frontend_script = os.path.join(frontend_dir, "run_frontend.bat")
-        with open(frontend_script, 'w') as f:
-            f.write('@echo off\n')
-            f.write('echo ================================================\n')
-            f.write('echo Starting AI Chatbot Frontend Server - Port 3000\n')
-            f.write('echo ================================================\n\n')
-            f.write(f'cd /d "{frontend_dir}"\n\n')
-            f.write('echo Setting PORT environment variable...\n')
-            f.write('set PORT=3000\n\n')
-            f.write('echo Starting React development server...\n')
-            f.write('npm start\n\n')
-            f.write('echo Frontend server stopped. Press any key to close this window...\n')
-            f.write('pause>nul\n')
-
-        await websocket.send_text(f"Created frontend starter script: {frontend_script}")
-
-        # Make sure backend is actually running before starting frontend
-        if not repo_setup_status["backend_running"]:
-            await websocket.send_text("⚠️ Warning: Backend may not be running. Frontend may not work correctly.")
-            repo_setup_status["backend_running"] = True  # Assume it's running anyway
-
-        # Start the frontend
+# Usage totals of the setup step the current task is running, if any
+step_usage = contextvars.ContextVar("step_usage", default=None)
+
+def new_usage():
+    return {"wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_bytes": 0, "read_bytes": 0, "write_bytes": 0, "processes": 0}
+
+def process_tree(pid):
+    """pid and all of its live descendants (just pid where /proc has no children lists)"""
+    pids = [pid]
+    for parent in pids:
         try:
-            await websocket.send_text("Starting frontend server...")
-            frontend_proc = subprocess.Popen(
-                f'start cmd /k "{frontend_script}"',
-                shell=True
-            )
-            await websocket.send_text("Frontend process started in a new window")
-            
-            # Wait for frontend to initialize
-            await websocket.send_text("Waiting for frontend server to initialize...")
-            for i in range(30, 0, -1):
-                await websocket.send_text(f"Frontend initialization: {i} seconds remaining...")
-                await asyncio.sleep(1)
-            
-            # Mark frontend as running
-            repo_setup_status["frontend_running"] = True
-            await websocket.send_text("✅ STEP 10 COMPLETE: Frontend server is running")
-            
-            # Final success message with access URL
-            await websocket.send_text("\n🎉 SETUP COMPLETE! Both services are now running.")
-            await websocket.send_text("\n✅ Backend API: http://localhost:8000")
-            await websocket.send_text("✅ Frontend UI: http://localhost:3000")
-            await websocket.send_text("\n[SUCCESS] You can now click the 'Access Application' button to open the application.")
-            
-        except Exception as e:
-            await websocket.send_text(f"Error starting frontend: {str(e)}")
-            await websocket.send_text("Setup process completed with errors.")
-            
-    except WebSocketDisconnect:
-        print("WebSocket disconnected")
-    except Exception as e:
-        error_message = f"Error: {str(e)}"
-        print(error_message)
+            for task in os.listdir(f"/proc/{parent}/task"):
+                with open(f"/proc/{parent}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            pass
+    return pids
+
+def read_process_usage(pid, usage):
+    """Fold a /proc sample of pid's process tree into usage.
+
+    A process's CPU time and disk I/O counters include the children it has already waited
+    for, and a child stays in the tree until it has been waited for, so summing the tree
+    counts every process once. The sums only drop once pid itself is gone, so CPU time,
+    I/O and resident memory are all kept as running maximums. Does nothing where /proc
+    isn't available.
+    """
+    cpu_seconds = read_bytes = write_bytes = rss_bytes = 0
+    for member in process_tree(pid):
         try:
-            await websocket.send_text(error_message)
-        except:
-            print("Could not send error message to client")
+            with open(f"/proc/{member}/stat") as f:
+                # Fields after the parenthesised command name; utime is field 14 of proc(5)
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu_seconds += sum(int(value) for value in fields[11:15]) / CLOCK_TICKS
+            with open(f"/proc/{member}/statm") as f:
+                rss_bytes += int(f.read().split()[1]) * PAGE_SIZE
+            with open(f"/proc/{member}/io") as f:
+                io = dict(line.split(":") for line in f if ":" in line)
+            read_bytes += int(io.get("read_bytes", 0))
+            write_bytes += int(io.get("write_bytes", 0))
+        except (OSError, ValueError, IndexError):
+            continue
+    usage["cpu_seconds"] = max(usage["cpu_seconds"], cpu_seconds)
+    usage["read_bytes"] = max(usage["read_bytes"], read_bytes)
+    usage["write_bytes"] = max(usage["write_bytes"], write_bytes)
+    usage["peak_rss_bytes"] = max(usage["peak_rss_bytes"], rss_bytes)
 
-async def run_command_with_status(websocket, command, cwd):
-    """Run a command and return its output - waits for completion before returning"""
-    await websocket.send_text(f"Running: {command}")
-    
-    try:
+async def sample_usage(pid, usage):
+    """Sample pid every USAGE_SAMPLE_INTERVAL seconds until cancelled"""
+    while True:
+        read_process_usage(pid, usage)
+        await asyncio.sleep(USAGE_SAMPLE_INTERVAL)
+
+def usage_attributes(usage):
+    """Usage counters as span attributes (the span itself carries the wall-clock time)"""
+    return {key: value for key, value in usage.items() if key != "wall_seconds"}
+
+def charge_usage(usage):
+    """Add one finished subprocess's usage to the current step's totals"""
+    totals = step_usage.get()
+    if totals is None:
+        return
+    totals["processes"] += 1
+    totals["cpu_seconds"] += usage["cpu_seconds"]
+    totals["read_bytes"] += usage["read_bytes"]
+    totals["write_bytes"] += usage["write_bytes"]
+    totals["peak_rss_bytes"] = max(totals["peak_rss_bytes"], usage["peak_rss_bytes"])
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_metric(name, help_text, metric_type, samples):
+    """Render one metric family in the Prometheus text exposition format"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        if labels:
+            label_text = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+        else:
+            lines.append(f"{name} {value}")
+    return lines
+
+def render_metrics():
+    """Per-step resource usage of remembered jobs plus process-wide totals"""
+    lines = []
+    states = collections.Counter(job["state"] for job in jobs.values())
+    lines += format_metric("runner_jobs", "Remembered jobs by state", "gauge",
+                           [({"state": state}, count) for state, count in sorted(states.items())])
+
+    step_metrics = [
+        ("wall_seconds", "runner_step_wall_seconds", "Wall-clock time of a setup step"),
+        ("cpu_seconds", "runner_step_cpu_seconds", "CPU time (user + system) of the subprocesses a setup step ran"),
+        ("peak_rss_bytes", "runner_step_peak_rss_bytes", "Largest resident memory of any subprocess tree a setup step ran"),
+        ("read_bytes", "runner_step_disk_read_bytes", "Bytes the subprocesses of a setup step read from disk"),
+        ("write_bytes", "runner_step_disk_write_bytes", "Bytes the subprocesses of a setup step wrote to disk"),
+        ("processes", "runner_step_processes", "Subprocesses a setup step ran"),
+    ]
+    for key, name, help_text in step_metrics:
+        samples = [
+            ({"job": job["id"], "repo": job["repo_url"], "step": step}, usage[key])
+            for job in sorted(jobs.values(), key=lambda job: job["created"])
+            for step, usage in job["usage"].items()
+        ]
+        lines += format_metric(name, help_text, "gauge", samples)
+
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        runner = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is in KiB on Linux but in bytes on macOS
+        rss_scale = 1 if sys.platform == "darwin" else 1024
+        lines += format_metric("runner_children_cpu_seconds_total", "CPU time of all finished subprocesses", "counter",
+                               [({}, children.ru_utime + children.ru_stime)])
+        lines += format_metric("runner_children_max_rss_bytes", "Largest resident memory of any finished subprocess", "gauge",
+                               [({}, children.ru_maxrss * rss_scale)])
+        lines += format_metric("runner_children_disk_write_bytes_total", "Bytes written to disk by finished subprocesses", "counter",
+                               [({}, children.ru_oublock * 512)])
+        lines += format_metric("runner_process_cpu_seconds_total", "CPU time of the runner itself", "counter",
+                               [({}, runner.ru_utime + runner.ru_stime)])
+    return "\n".join(lines) + "\n"
+
+async def _pump_lines(stream, label, on_line, tail):
+    """Read a pipe in bounded chunks and hand each complete line to on_line"""
+    pending = b""
+    while True:
+        chunk = await stream.read(COMMAND_STREAM_LIMIT)
+        if not chunk:
+            break
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        # Never let a single unterminated line grow without bound
+        if len(pending) > COMMAND_MAX_LINE:
+            lines.append(pending)
+            pending = b""
+        for raw in lines:
+            text = raw[:COMMAND_MAX_LINE].decode(errors="replace").rstrip("\r")
+            if text.strip():
+                tail.append(text)
+                await on_line(label, text)
+    if pending.strip():
+        text = pending[:COMMAND_MAX_LINE].decode(errors="replace").rstrip("\r")
+        tail.append(text)
+        await on_line(label, text)
+
+async def stream_command(command, cwd, on_line, tail_lines=COMMAND_TAIL_LINES):
+    """Run a shell command, reading stdout and stderr concurrently line by line.
+
+    Each line is passed to on_line(label, text) as soon as it arrives. Only the last
+    tail_lines lines are kept, so memory stays flat however much the command prints.
+    Returns (returncode, tail).
+    """
+    output = {"lines": 0, "bytes": 0}
+
+    async def counted(label, text):
+        output["lines"] += 1
+        output["bytes"] += len(text) + 1
+        await on_line(label, text)
+
+    with trace_span("command", command=command, cwd=cwd) as span:
         process = await asyncio.create_subprocess_shell(
             command,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=cwd,
-            shell=True
+            limit=COMMAND_STREAM_LIMIT
         )
+
+        tail = collections.deque(maxlen=tail_lines)
+        usage = new_usage()
+        sampler = asyncio.create_task(sample_usage(process.pid, usage))
+        try:
+            await asyncio.gather(
+                _pump_lines(process.stdout, "stdout", counted, tail),
+                _pump_lines(process.stderr, "stderr", counted, tail)
+            )
+            # The pipes close as the command exits: take a last sample in case it is still there
+            read_process_usage(process.pid, usage)
+            returncode = await process.wait()
+        finally:
+            sampler.cancel()
+            charge_usage(usage)
+            span["attributes"].update(output_lines=output["lines"], output_bytes=output["bytes"], **usage_attributes(usage))
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        span["attributes"]["exit_code"] = returncode
+        if returncode != 0:
+            span["status"] = "failed"
+
+    return returncode, list(tail)
+
+async def run_command_with_status(websocket, command, cwd):
+    """Run a command, streaming its output line by line - waits for completion before returning"""
+    await websocket.send_text(f"Running: {command}")
+    
+    async def forward(label, text):
+        await websocket.send_text(text)
+    
+    try:
+        returncode, tail = await stream_command(command, cwd, forward)
         
-        stdout, stderr = await process.communicate()
-        
-        stdout_text = stdout.decode() if stdout else ""
-        stderr_text = stderr.decode() if stderr else ""
-        
-        if stdout_text:
-            await websocket.send_text(f"Command output:\n{stdout_text}")
-        
-        if stderr_text:
-            await websocket.send_text(f"Command error:\n{stderr_text}")
-        
-        if process.returncode != 0:
-            await websocket.send_text(f"⚠️ Command failed with return code {process.returncode}")
-            raise Exception(f"Command failed with return code {process.returncode}")
+        if returncode != 0:
+            await websocket.send_text(f"⚠️ Command failed with return code {returncode}")
+            last_lines = "\n".join(tail[-10:])
+            raise Exception(f"Command failed with return code {returncode}\n{last_lines}")
         else:
             await websocket.send_text(f"Command completed successfully")
         
-        return stdout_text + stderr_text
+        return "\n".join(tail)
     except Exception as e:
         await websocket.send_text(f"Error executing command: {str(e)}")
         raise
 
+def get_http_client():
+    """Shared connection-pooled client used for every outbound HTTP call"""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            follow_redirects=True
+        )
+    return http_client
+
+@app.on_event("shutdown")
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+async def probe_tcp(host, port, timeout=READY_PROBE_TIMEOUT):
+    """True if something accepts TCP connections on host:port"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+async def probe_http(url, timeout=READY_PROBE_TIMEOUT):
+    """Send a GET to url and return the response status code, or None if there is no valid answer"""
+    try:
+        response = await get_http_client().get(url, timeout=timeout)
+        return response.status_code
+    except httpx.HTTPError:
+        return None
+
+@traced("readiness")
+async def wait_until_ready(log, name, url, deadline):
+    """Probe a service until it answers over HTTP, or until deadline seconds have passed.
+
+    Each round checks the TCP port first and only then sends an HTTP request. Rounds are
+    spaced by exponential backoff with jitter, so a fast service is seen within a fraction
+    of a second and a slow one isn't hammered. Returns True once the service answers.
+    """
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    started = time.monotonic()
+    delay = READY_INITIAL_DELAY
+    last_phase = None
+    while True:
+        if await probe_tcp(parts.hostname, port):
+            status_code = await probe_http(url)
+            # Any answer short of a server error means the app is up (it may not serve "/")
+            if status_code is not None and status_code < 500:
+                await log.send_text(f"✅ {name} server is running and responding on {url} after {time.monotonic() - started:.1f}s")
+                return True
+            phase = f"port {port} is open, waiting for HTTP responses"
+        else:
+            phase = f"waiting for port {port}"
+        if phase != last_phase:
+            await log.send_text(f"{name} not responding yet ({phase})...")
+            last_phase = phase
+
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            await log.send_text(f"⚠️ {name} did not respond on {url} within {deadline:g}s")
+            return False
+        # Sleep between half and all of the current delay, never past the deadline
+        await asyncio.sleep(min(remaining, delay / 2 + random.uniform(0, delay / 2)))
+        delay = min(delay * 2, READY_MAX_DELAY)
+
 async def check_service_availability(websocket, url, max_retries=3):
     """Check if a service is available at the given URL"""
     await websocket.send_text(f"Checking availability of {url}...")
     
-    try:
-        import requests
-        
-        for attempt in range(1, max_retries + 1):
-            try:
-                await websocket.send_text(f"Connection attempt {attempt} of {max_retries}...")
-                response = requests.get(url, timeout=5)
-                
-                if response.status_code < 400:
-                    await websocket.send_text(f"Service at {url} is responding with status code {response.status_code}")
-                    return True
-                else:
-                    await websocket.send_text(f"Service at {url} responded with status code {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                await websocket.send_text(f"Connection failed: {str(e)}")
-                
-            if attempt < max_retries:
-                await websocket.send_text("Waiting before retry...")
-                await asyncio.sleep(3)
-        
-        await websocket.send_text(f"Service at {url} is not available after {max_retries} attempts")
-        return False
-    except ImportError:
-        await websocket.send_text("Warning: Cannot verify service availability (requests module not available)")
-        return True  # Assume it's running if we can't check
+    for attempt in range(1, max_retries + 1):
+        try:
+            await websocket.send_text(f"Connection attempt {attempt} of {max_retries}...")
+            response = await get_http_client().get(url, timeout=5)
+            
+            if response.status_code < 400:
+                await websocket.send_text(f"Service at {url} is responding with status code {response.status_code}")
+                return True
+            else:
+                await websocket.send_text(f"Service at {url} responded with status code {response.status_code}")
+        except httpx.HTTPError as e:
+            await websocket.send_text(f"Connection failed: {str(e)}")
+            
+        if attempt < max_retries:
+            await websocket.send_text("Waiting before retry...")
+            await asyncio.sleep(3)
+    
+    await websocket.send_text(f"Service at {url} is not available after {max_retries} attempts")
+    return False
 
 async def use_zip_download(websocket, work_dir, repo_path=None):
     """Download repository as ZIP if git clone fails"""
@@ -619,46 +2891,17 @@ async def use_zip_download(websocket, work_dir, repo_path=None):
     
     await websocket.send_text("Downloading repository as ZIP...")
     try:
-        import requests
-        import zipfile
-        import io
-        import time
-        
-        # Download zip file
         zip_url = "https://github.com/AmruthaYalla04/aichatbot/archive/refs/heads/main.zip"
         await websocket.send_text(f"Downloading from {zip_url}")
         
-        response = requests.get(zip_url, stream=True)
-        if response.status_code == 200:
-            # Extract the zip
-            await websocket.send_text("Download successful. Extracting zip file...")
-            
-            # Save zip file to disk
-            zip_path = os.path.join(work_dir, "repo.zip")
-            with open(zip_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Extract zip
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(work_dir)
-            
-            # Remove zip file
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            
-            # Check if the extracted directory exists
-            extracted_dir = os.path.join(work_dir, "aichatbot-main")
-            if os.path.exists(extracted_dir):
-                # Don't try to rename, just use the extracted directory as is
-                await websocket.send_text(f"⚠️ Using directory as extracted: {extracted_dir}")
-                await websocket.send_text(f"✓ Repository extracted successfully")
-                return extracted_dir  # Return the actual path that we'll use
-            else:
-                await websocket.send_text("⚠️ ZIP extraction failed: No directory found after extraction")
-                return False
+        extracted_dir = await download_archive(websocket, zip_url, work_dir)
+        if extracted_dir and os.path.exists(extracted_dir):
+            # Don't try to rename, just use the extracted directory as is
+            await websocket.send_text(f"⚠️ Using directory as extracted: {extracted_dir}")
+            await websocket.send_text(f"✓ Repository extracted successfully")
+            return extracted_dir  # Return the actual path that we'll use
         else:
-            await websocket.send_text(f"⚠️ Failed to download ZIP: HTTP status {response.status_code}")
+            await websocket.send_text("⚠️ ZIP extraction failed: No directory found after extraction")
             return False
     except Exception as e:
         await websocket.send_text(f"⚠️ Error downloading/extracting ZIP: {str(e)}")
@@ -877,7 +3120,8 @@ export default App;
     await websocket.send_text("Demo structure created successfully!")
     return True
 
-async def setup_backend(websocket, base_dir):
+@traced("setup_backend")
+async def setup_backend(websocket, base_dir, port=BACKEND_PORT_BASE):
     """Set up and run the backend"""
     backend_dir = os.path.join(base_dir, "backend")
     if not os.path.exists(backend_dir):
@@ -891,7 +3135,9 @@ async def setup_backend(websocket, base_dir):
     # Create virtual environment
     await websocket.send_text("Creating Python virtual environment...")
     try:
-        await run_command(websocket, "python -m venv venv", backend_dir)
+        venv_dir = os.path.join(backend_dir, "venv")
+        if os.path.exists(venv_dir) or not await venv_pool.take(venv_dir):
+            await run_command(websocket, "python -m venv venv", backend_dir)
     except Exception as e:
         await websocket.send_text(f"Error creating venv: {str(e)}")
         await websocket.send_text("Trying to continue without virtual environment...")
@@ -938,15 +3184,16 @@ def read_root():
 """)
     
     # Start backend
-    await websocket.send_text("Starting backend server on port 8000...")
-    start_cmd = f"\"{venv_python}\" -m uvicorn main:app --reload --host 0.0.0.0 --port 8000"
+    await websocket.send_text(f"Starting backend server on port {port}...")
+    start_cmd = f"\"{venv_python}\" -m uvicorn main:app --reload --host 0.0.0.0 --port {port}"
     
     backend_process = await start_process(websocket, start_cmd, backend_dir)
     
     await websocket.send_text("Backend started successfully!")
     return True
 
-async def setup_frontend(websocket, base_dir):
+@traced("setup_frontend")
+async def setup_frontend(websocket, base_dir, port=FRONTEND_PORT_BASE):
     """Set up and run the frontend"""
     frontend_dir = os.path.join(base_dir, "frontend")
     if not os.path.exists(frontend_dir):
@@ -989,16 +3236,23 @@ async def setup_frontend(websocket, base_dir):
   }
 }""")
     
-    # Install dependencies
+    # Install dependencies, reusing the node_modules store when possible
     await websocket.send_text("Installing frontend dependencies...")
     try:
-        await run_command(websocket, "npm install", frontend_dir)
+        node_modules_key, node_modules_hit = await restore_node_modules(websocket, frontend_dir)
+        if not node_modules_hit:
+            returncode = await run_command(websocket, "npm install", frontend_dir)
+            if returncode == 0 and node_modules_key:
+                await store_node_modules(websocket, frontend_dir, node_modules_key)
     except Exception as e:
         await websocket.send_text(f"Error installing dependencies: {str(e)}")
     
     # Start frontend
-    await websocket.send_text("Starting frontend on port 3000...")
-    start_cmd = "set PORT=3000 && npm start"
+    await websocket.send_text(f"Starting frontend on port {port}...")
+    if platform.system() == "Windows":
+        start_cmd = f"set PORT={port} && npm start"
+    else:
+        start_cmd = f"PORT={port} npm start"
     
     frontend_process = await start_process(websocket, start_cmd, frontend_dir)
     
@@ -1009,109 +3263,34 @@ async def run_command(websocket, command, cwd):
     """Run a command and stream output to the websocket"""
     await websocket.send_text(f"Running: {command}")
     
-    process = await asyncio.create_subprocess_shell(
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        cwd=cwd,
-        shell=True
-    )
-    
-    stdout, stderr = await process.communicate()
-    
-    if stdout:
-        stdout_text = stdout.decode()
-        await websocket.send_text(f"Command output:\n{stdout_text}")
+    async def forward(label, text):
+        await websocket.send_text(text)
     
-    if stderr:
-        stderr_text = stderr.decode()
-        await websocket.send_text(f"Command error:\n{stderr_text}")
+    returncode, _ = await stream_command(command, cwd, forward)
     
-    if process.returncode != 0:
-        await websocket.send_text(f"Command failed with return code {process.returncode}")
+    if returncode != 0:
+        await websocket.send_text(f"Command failed with return code {returncode}")
     else:
         await websocket.send_text(f"Command completed successfully")
+    
+    return returncode
 
 async def start_process(websocket, command, cwd):
-    """Start a long-running process and stream output to the websocket"""
+    """Start a long-running process under the supervisor and stream its output to the websocket"""
     await websocket.send_text(f"Starting process: {command}")
     
+    async def forward(label, text):
+        prefix = "Process output" if label == "stdout" else "Process error"
+        await websocket.send_text(f"{prefix}: {text}")
+    
     try:
-        # For Windows, use a more reliable approach for starting processes
-        if platform.system() == "Windows":
-            # Create a batch file for executing the command
-            batch_file = os.path.join(cwd, "run_command.bat")
-            with open(batch_file, 'w') as f:
-                f.write("@echo off\n")
-                f.write(f"cd /d \"{cwd}\"\n")
-                # For backend server, use a different approach
-                if "uvicorn main:app" in command:
-                    if "activate.bat" in command:
-                        f.write("call venv\\Scripts\\activate.bat\n")
-                    f.write("python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000\n")
-                    f.write("pause\n")
-                # For frontend server
-                elif "npm start" in command:
-                    f.write("set PORT=3000\n")
-                    f.write("npm start\n")
-                    f.write("pause\n")
-                else:
-                    # Generic command
-                    f.write(f"{command}\n")
-            
-            # Execute the batch file in a new window
-            process = subprocess.Popen(
-                f'start cmd /c "{batch_file}"', 
-                shell=True,
-                cwd=cwd
-            )
-            
-            await websocket.send_text(f"Process started in a new window with command file: {batch_file}")
-            
-            # Return a dummy process
-            dummy_process = await asyncio.create_subprocess_shell(
-                "echo Process started in separate window",
-                stdout=asyncio.subprocess.PIPE, 
-                stderr=asyncio.subprocess.PIPE,
-                shell=True
-            )
-            return dummy_process
-        else:
-            # For non-Windows, use the existing approach
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                shell=True
-            )
-            
-            # Stream output in the background
-            asyncio.create_task(stream_output(websocket, process))
-            return process
+        service = await launch_service(None, "process", command, cwd, on_line=forward)
+        await websocket.send_text(f"Process started with pid {service['pid']} (service {service['id']})")
+        return service["process"]
     except Exception as e:
         await websocket.send_text(f"Error starting process: {str(e)}")
         raise
 
-async def stream_output(websocket, process):
-    """Stream process output to the websocket"""
-    while True:
-        line = await process.stdout.readline()
-        if not line:
-            break
-        line_text = line.decode().strip()
-        if line_text:
-            await websocket.send_text(f"Process output: {line_text}")
-    
-    # Also check stderr
-    while True:
-        line = await process.stderr.readline()
-        if not line:
-            break
-        line_text = line.decode().strip()
-        if line_text:
-            await websocket.send_text(f"Process error: {line_text}")
-
 if __name__ == "__main__":
     import uvicorn
     
@@ -1122,7 +3301,7 @@ if __name__ == "__main__":
     # Start the backend API
     print(f"Starting backend API on port {backend_port}")
     print(f"Main application UI will be available at http://localhost:{frontend_port}/ui")
-    print(f"Cloned repository (when run) will use ports 3000/8000")
+    print(f"Cloned repositories (when run) lease port pairs from {FRONTEND_PORT_BASE}/{BACKEND_PORT_BASE} upwards")
     
     # Explicitly set environment variable for React
     os.environ['PORT'] = str(frontend_port)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("RUNNER_WORK_DIR", tempfile.mkdtemp(prefix="runner-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+class RecordingLog:
+    def __init__(self):
+        self.lines = []
+
+    async def send_text(self, text):
+        self.lines.append(text)
+
+
+def fake_npm(bin_dir, calls_file, exit_code):
+    """Put an npm on PATH that records each call and exits with exit_code"""
+    path = os.path.join(bin_dir, "npm")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\necho "$@" >> "{calls_file}"\nexit {exit_code}\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the npm stand-in is a shell script")
+def test_failed_npm_install_runs_again_on_resume(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls_file = tmp_path / "npm-calls"
+    calls_file.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(main, "node_modules_cache", main.DirectoryCache(str(tmp_path / "cache"), 1024 ** 3))
+
+    frontend_dir = tmp_path / "frontend"
+    frontend_dir.mkdir()
+    (frontend_dir / "package.json").write_text('{"name": "fixture"}')
+    ctx = {"work_dir": str(tmp_path), "frontend_dir": str(frontend_dir), "repo_url": "fixture", "ref": None, "job_id": "test"}
+    pipeline = [("frontend_deps", main.step_install_frontend_deps, [], None)]
+
+    def run():
+        log = RecordingLog()
+        results = asyncio.run(main.run_pipeline(log, dict(ctx), pipeline, main.SETUP_CHECKPOINTS))
+        return results, log.lines
+
+    def npm_installs():
+        return calls_file.read_text().splitlines().count("install")
+
+    def checkpoint_status():
+        with open(main.checkpoint_path(ctx, "frontend_deps")) as f:
+            return json.load(f)["status"]
+
+    # Counts are compared between runs, so they don't depend on how often a fallback retries
+    fake_npm(str(bin_dir), calls_file, 1)
+    results, _ = run()
+    failed_installs = npm_installs()
+    # The run carries on as before, but the checkpoint records the failure
+    assert results == {"frontend_deps": "done"}
+    assert checkpoint_status() == "failed"
+    assert failed_installs >= 1
+
+    fake_npm(str(bin_dir), calls_file, 0)
+    _, lines = run()
+    assert npm_installs() > failed_installs
+    assert not any("Reusing the checkpoint" in line for line in lines)
+    assert checkpoint_status() == "done"
+
+    installs = npm_installs()
+    _, lines = run()
+    assert npm_installs() == installs
+    assert any("Reusing the checkpoint of frontend_deps" in line for line in lines)
@@ -0,0 +1,341 @@
+"""
+Offline end-to-end benchmark of the repository setup flow.
+
+Builds a fixture repository (served over file://), a local wheelhouse and npm/node
+stand-ins, starts the runner against a private work directory, and drives
+/ws/run-repo for N cold-cache and N warm-cache iterations. Per-step and total
+timings are summarised and compared with a stored baseline.
+
+Needs git and the runner's own requirements (fastapi, uvicorn, httpx, websockets);
+nothing is fetched from the network. Linux/macOS only.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+import zipfile
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(PROJECT_DIR, "backend")
+DEFAULT_BASELINE = os.path.join(PROJECT_DIR, "benchmark_baseline.json")
+
+# Stand-in for uvicorn inside the cloned app's venv: serves HTTP on --port
+UVICORN_STANDIN = '''import argparse
+import http.server
+
+parser = argparse.ArgumentParser()
+parser.add_argument("app")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8000)
+parser.add_argument("--reload", action="store_true")
+args = parser.parse_args()
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+http.server.ThreadingHTTPServer((args.host, args.port), Handler).serve_forever()
+'''
+
+# Stand-in for npm: "install" fills node_modules from package.json, "start" serves $PORT
+NPM_STANDIN = '''#!{python}
+import http.server
+import json
+import os
+import sys
+
+command = sys.argv[1:2]
+if command == ["--version"]:
+    print("10.0.0-bench")
+elif command == ["install"]:
+    with open("package.json") as f:
+        dependencies = json.load(f).get("dependencies", {{}})
+    for name, version in dependencies.items():
+        package_dir = os.path.join("node_modules", name)
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, "package.json"), "w") as f:
+            json.dump({{"name": name, "version": version}}, f)
+        for index in range({files_per_package}):
+            with open(os.path.join(package_dir, f"module{{index}}.js"), "w") as f:
+                f.write(f"module.exports = {{index}};\\n" * 64)
+    print(f"added {{len(dependencies)}} packages")
+elif command == ["start"]:
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    http.server.ThreadingHTTPServer(("0.0.0.0", int(os.environ.get("PORT", 3000))), Handler).serve_forever()
+else:
+    print(f"npm stand-in: unsupported command {{sys.argv[1:]}}", file=sys.stderr)
+    sys.exit(1)
+'''
+
+NODE_STANDIN = '''#!/bin/sh
+echo "v20.0.0-bench"
+'''
+
+
+def free_port():
+    """A TCP port nothing is listening on right now"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def run(args, cwd=None):
+    subprocess.run(args, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def build_wheel(wheel_dir, name, version, files):
+    """Write a pure-Python wheel containing files ({path: text}) and return its path"""
+    dist = f"{name.replace('-', '_')}-{version}"
+    entries = {path: text.encode() for path, text in files.items()}
+    entries[f"{dist}.dist-info/METADATA"] = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n".encode()
+    entries[f"{dist}.dist-info/WHEEL"] = b"Wheel-Version: 1.0\nGenerator: benchmark\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+    record = []
+    for path, data in entries.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+        record.append(f"{path},sha256={digest},{len(data)}")
+    record.append(f"{dist}.dist-info/RECORD,,")
+    entries[f"{dist}.dist-info/RECORD"] = ("\n".join(record) + "\n").encode()
+
+    wheel_path = os.path.join(wheel_dir, f"{dist}-py3-none-any.whl")
+    with zipfile.ZipFile(wheel_path, "w", zipfile.ZIP_DEFLATED) as wheel:
+        for path, data in entries.items():
+            wheel.writestr(path, data)
+    return wheel_path
+
+def build_fixture(root, source_files, packages, files_per_package):
+    """Create the fixture repository, wheelhouse and tool stand-ins under root.
+
+    Returns (repo_url, environment overrides for the runner).
+    """
+    wheel_dir = os.path.join(root, "wheels")
+    bin_dir = os.path.join(root, "bin")
+    source_dir = os.path.join(root, "source")
+    bare_repo = os.path.join(root, "fixture.git")
+    for path in (wheel_dir, bin_dir, source_dir):
+        os.makedirs(path)
+
+    # Python packages the fixture backend requires
+    build_wheel(wheel_dir, "uvicorn", "0.0.1", {"uvicorn/__init__.py": "", "uvicorn/__main__.py": UVICORN_STANDIN})
+    build_wheel(wheel_dir, "bench-payload", "1.0", {
+        f"bench_payload/module{index}.py": f"VALUE = {index}\n" * 64 for index in range(200)
+    })
+
+    # npm and node stand-ins, first on the runner's PATH
+    npm_path = os.path.join(bin_dir, "npm")
+    with open(npm_path, "w") as f:
+        f.write(NPM_STANDIN.format(python=sys.executable, files_per_package=files_per_package))
+    node_path = os.path.join(bin_dir, "node")
+    with open(node_path, "w") as f:
+        f.write(NODE_STANDIN)
+    for path in (npm_path, node_path):
+        os.chmod(path, 0o755)
+
+    # The repository itself, laid out like the AI Chatbot one
+    backend = os.path.join(source_dir, "chatbot", "backend")
+    frontend = os.path.join(source_dir, "chatbot", "frontend")
+    os.makedirs(backend)
+    os.makedirs(os.path.join(frontend, "src"))
+    with open(os.path.join(backend, "main.py"), "w") as f:
+        f.write("app = None\n")
+    with open(os.path.join(backend, "requirements.txt"), "w") as f:
+        f.write("uvicorn==0.0.1\nbench-payload==1.0\n")
+    dependencies = {f"bench-package-{index}": "1.0.0" for index in range(packages)}
+    package_json = {"name": "bench-frontend", "version": "0.1.0", "private": True,
+                    "dependencies": dependencies, "scripts": {"start": "react-scripts start"}}
+    with open(os.path.join(frontend, "package.json"), "w") as f:
+        json.dump(package_json, f, indent=2)
+    with open(os.path.join(frontend, "package-lock.json"), "w") as f:
+        json.dump({"name": "bench-frontend", "lockfileVersion": 3, "packages": dependencies}, f, indent=2)
+    for index in range(source_files):
+        with open(os.path.join(frontend, "src", f"component{index}.js"), "w") as f:
+            f.write(f"export const component{index} = () => {index};\n" * 32)
+
+    run(["git", "init", "-q", source_dir])
+    run(["git", "add", "-A"], cwd=source_dir)
+    run(["git", "-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost",
+         "commit", "-q", "-m", "Fixture repository"], cwd=source_dir)
+    run(["git", "clone", "-q", "--bare", source_dir, bare_repo])
+
+    environment = {
+        "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+        "PIP_NO_INDEX": "1",
+        "PIP_FIND_LINKS": wheel_dir,
+        "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+    }
+    return f"file://{bare_repo}", environment
+
+def http_json(method, url):
+    request = urllib.request.Request(url, method=method)
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read() or b"null")
+
+def start_runner(work_dir, environment, port):
+    """Start the runner (backend/main.py) on port with its own work directory"""
+    env = dict(os.environ)
+    env.update(environment)
+    env.update({
+        "RUNNER_WORK_DIR": work_dir,
+        # Keep the cloned app away from ports a developer may be using
+        "BACKEND_PORT_BASE": str(free_port()),
+        "FRONTEND_PORT_BASE": str(free_port()),
+        "PORT_PAIRS": "1",
+        # Pre-built pool venvs would survive clear_caches and make cold runs partly warm
+        "VENV_POOL_SIZE": "0",
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            http_json("GET", f"http://127.0.0.1:{port}/")
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Runner did not start within 30s")
+
+async def run_iteration(port, repo_url):
+    """Run one setup through the WebSocket and return the finished job"""
+    import websockets
+
+    query = urllib.parse.urlencode({"repo_url": repo_url})
+    job_id = None
+    started = time.monotonic()
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/run-repo?{query}", max_size=None) as websocket:
+        async for frame in websocket:
+            for line in frame.split("\n"):
+                if line.startswith("[JOB] "):
+                    job_id = line[len("[JOB] "):].strip()
+    elapsed = time.monotonic() - started
+    if job_id is None:
+        raise RuntimeError("The runner never reported a job id")
+    job = http_json("GET", f"http://127.0.0.1:{port}/jobs/{job_id}")
+    # Stops the job's services and frees its ports for the next iteration
+    http_json("DELETE", f"http://127.0.0.1:{port}/jobs/{job_id}")
+    job["total"] = elapsed
+    return job
+
+def clear_caches(work_dir):
+    for name in (".cache", ".mirrors"):
+        shutil.rmtree(os.path.join(work_dir, name), ignore_errors=True)
+
+def summarise(runs):
+    """{"total": stats, "steps": {step: stats}} with median/min/max seconds per series"""
+    def stats(values):
+        return {"median": statistics.median(values), "min": min(values), "max": max(values), "runs": len(values)}
+
+    steps = {}
+    for job in runs:
+        for step, seconds in job["timings"].items():
+            steps.setdefault(step, []).append(seconds)
+    return {"total": stats([job["total"] for job in runs]), "steps": {step: stats(values) for step, values in steps.items()}}
+
+def compare(results, baseline, threshold):
+    """Print median changes against the baseline; return True if anything regressed past threshold"""
+    regressed = False
+    for mode in ("cold", "warm"):
+        if mode not in baseline or mode not in results:
+            continue
+        print(f"\n{mode} caches (median seconds, baseline -> now):")
+        series = [("total", baseline[mode]["total"], results[mode]["total"])]
+        series += [(step, baseline[mode]["steps"].get(step), stats) for step, stats in results[mode]["steps"].items()]
+        for name, before, after in series:
+            if not before:
+                print(f"  {name:<16} (new) -> {after['median']:.2f}")
+                continue
+            change = (after["median"] - before["median"]) / before["median"] if before["median"] else 0.0
+            # Sub-50ms steps are noise, whatever the percentage says
+            flag = change > threshold and after["median"] - before["median"] > 0.05
+            regressed = regressed or flag
+            print(f"  {name:<16} {before['median']:.2f} -> {after['median']:.2f} ({change:+.0%}){'  REGRESSION' if flag else ''}")
+    return regressed
+
+def print_summary(results):
+    for mode, summary in results.items():
+        total = summary["total"]
+        print(f"\n{mode} caches: total median {total['median']:.2f}s (min {total['min']:.2f}s, max {total['max']:.2f}s)")
+        for step, stats in summary["steps"].items():
+            print(f"  {step:<16} {stats['median']:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=3, help="cold and warm runs each (default 3)")
+    parser.add_argument("--source-files", type=int, default=500, help="files in the fixture frontend (default 500)")
+    parser.add_argument("--packages", type=int, default=200, help="npm packages the fixture depends on (default 200)")
+    parser.add_argument("--files-per-package", type=int, default=10, help="files per npm package (default 10)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression (default 0.10)")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if shutil.which("git") is None:
+        print("git is required")
+        return 1
+
+    root = tempfile.mkdtemp(prefix="runner-benchmark-")
+    runner = None
+    try:
+        print(f"Building fixture in {root}...")
+        repo_url, environment = build_fixture(root, args.source_files, args.packages, args.files_per_package)
+        work_dir = os.path.join(root, "work")
+        port = free_port()
+        runner = start_runner(work_dir, environment, port)
+
+        runs = {"cold": [], "warm": []}
+        for iteration in range(1, args.iterations + 1):
+            # A cold run starts without caches or mirror and leaves them primed for the warm one
+            for mode in ("cold", "warm"):
+                if mode == "cold":
+                    clear_caches(work_dir)
+                job = asyncio.run(run_iteration(port, repo_url))
+                incomplete = [step for step, result in job["results"].items() if result != "done"]
+                print(f"[{iteration}/{args.iterations}] {mode}: {job['total']:.2f}s ({job['state']})")
+                if incomplete:
+                    print(f"  incomplete steps: {', '.join(incomplete)}")
+                runs[mode].append(job)
+
+        results = {mode: summarise(jobs) for mode, jobs in runs.items()}
+        print_summary(results)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+
+        regressed = False
+        if args.save_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nBaseline saved to {args.baseline}")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                regressed = compare(results, json.load(f), args.threshold)
+        else:
+            print(f"\nNo baseline at {args.baseline}; rerun with --save-baseline to store one")
+        return 1 if regressed else 0
+    finally:
+        if runner is not None:
+            runner.terminate()
+            try:
+                runner.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                runner.kill()
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,68 +1,325 @@
-import React, { useState, useRef, useEffect } from 'react';
+import React, { useState, useRef, useEffect, useLayoutEffect, useCallback } from 'react';
 import './App.css';
 
+// Attempts to resume a job's log stream after the connection drops
+const MAX_RECONNECTS = 5;
+
+// The log view keeps the most recent LOG_CAPACITY lines in memory and only mounts the rows
+// in view; the full log is paged in from the server on demand, LOG_PAGE_SIZE lines at a time
+const LOG_CAPACITY = 10000;
+const LOG_ROW_HEIGHT = 20;
+const LOG_OVERSCAN = 30;
+const LOG_PAGE_SIZE = 500;
+const LOG_CACHED_PAGES = 40;
+
+// Fixed-size ring buffer of log lines: appending is O(1) and the oldest lines fall off
+class LogBuffer {
+  constructor(capacity) {
+    this.capacity = capacity;
+    this.lines = new Array(capacity);
+    this.clear();
+  }
+
+  clear() {
+    this.start = 0;
+    this.length = 0;
+    this.dropped = 0;
+  }
+
+  push(line) {
+    if (this.length < this.capacity) {
+      this.lines[(this.start + this.length) % this.capacity] = line;
+      this.length += 1;
+    } else {
+      this.lines[this.start] = line;
+      this.start = (this.start + 1) % this.capacity;
+      this.dropped += 1;
+    }
+  }
+
+  get(index) {
+    return this.lines[(this.start + index) % this.capacity];
+  }
+}
+
+// Windowed list: only the rows in view (plus some overscan) are mounted, each one
+// LOG_ROW_HEIGHT high. Follows new lines while scrolled to the bottom.
+function LogView({ count, getLine, version, onRangeChange }) {
+  const containerRef = useRef(null);
+  const atBottomRef = useRef(true);
+  const [scrollTop, setScrollTop] = useState(0);
+  const [viewportHeight, setViewportHeight] = useState(0);
+
+  useLayoutEffect(() => {
+    const container = containerRef.current;
+    setViewportHeight(container.clientHeight);
+    if (atBottomRef.current) {
+      container.scrollTop = container.scrollHeight;
+    }
+  }, [count, version]);
+
+  const onScroll = (event) => {
+    const container = event.currentTarget;
+    atBottomRef.current = container.scrollTop + container.clientHeight >= container.scrollHeight - LOG_ROW_HEIGHT;
+    setScrollTop(container.scrollTop);
+  };
+
+  const first = Math.max(0, Math.floor(scrollTop / LOG_ROW_HEIGHT) - LOG_OVERSCAN);
+  const last = Math.min(count, Math.ceil((scrollTop + viewportHeight) / LOG_ROW_HEIGHT) + LOG_OVERSCAN);
+
+  useEffect(() => {
+    if (onRangeChange) {
+      onRangeChange(first, last);
+    }
+  }, [first, last, onRangeChange]);
+
+  const rows = [];
+  for (let index = first; index < last; index++) {
+    const line = getLine(index);
+    rows.push(
+      <div key={index} className="log-line" style={{ top: index * LOG_ROW_HEIGHT }} title={line}>
+        {line === undefined ? '…' : line}
+      </div>
+    );
+  }
+
+  return (
+    <div className="logs" ref={containerRef} onScroll={onScroll}>
+      <div className="log-rows" style={{ height: count * LOG_ROW_HEIGHT }}>
+        {rows}
+      </div>
+    </div>
+  );
+}
+
 function App() {
-  const [logs, setLogs] = useState([]);
+  const [logBuffer] = useState(() => new LogBuffer(LOG_CAPACITY));
+  const [logVersion, setLogVersion] = useState(0);
   const [isRunning, setIsRunning] = useState(false);
   const [isConnected, setIsConnected] = useState(false);
   const [isSetupComplete, setIsSetupComplete] = useState(false);
+  const [cloneProgress, setCloneProgress] = useState(null);
+  const [jobId, setJobId] = useState(null);
+  const [appPorts, setAppPorts] = useState({ backend: 8000, frontend: 3000 });
   const websocketRef = useRef(null);
-  const logEndRef = useRef(null);
-
-  // Scroll to bottom of logs when they update
-  useEffect(() => {
-    if (logEndRef.current) {
-      logEndRef.current.scrollIntoView({ behavior: 'smooth' });
-    }
-  }, [logs]);
+  // Lines received since the last animation frame; they reach the buffer together
+  const pendingLogsRef = useRef([]);
+  const logFrameRef = useRef(null);
+  // Full log paged in from the server, by page number
+  const [showFullLog, setShowFullLog] = useState(false);
+  const [fullLogTotal, setFullLogTotal] = useState(0);
+  const [fullLogVersion, setFullLogVersion] = useState(0);
+  const fullLogPagesRef = useRef(new Map());
+  const fullLogLoadingRef = useRef(new Set());
+  // Where to resume the job's log after a dropped connection
+  const jobIdRef = useRef(null);
+  const logOffsetRef = useRef(0);
+  const reconnectsRef = useRef(0);
 
   // Close websocket on component unmount
   useEffect(() => {
     return () => {
-      if (websocketRef.current) {
-        websocketRef.current.close();
+      closeLogStream();
+      if (logFrameRef.current !== null) {
+        cancelAnimationFrame(logFrameRef.current);
       }
     };
   }, []);
 
-  // More aggressive polling for setup status
+  // Queue lines for the log view; it re-renders at most once per animation frame
+  const appendLogs = (lines) => {
+    const pending = pendingLogsRef.current;
+    for (const line of lines) {
+      pending.push(line);
+    }
+    if (logFrameRef.current === null) {
+      logFrameRef.current = requestAnimationFrame(() => {
+        logFrameRef.current = null;
+        for (const line of pendingLogsRef.current) {
+          logBuffer.push(line);
+        }
+        pendingLogsRef.current = [];
+        setLogVersion(version => version + 1);
+      });
+    }
+  };
+
+  const addLog = (message) => {
+    appendLogs([message]);
+  };
+
+  // Fetch the pages of the full log that cover rows first..last
+  const loadFullLog = useCallback((first, last) => {
+    const id = jobIdRef.current;
+    const pages = fullLogPagesRef.current;
+    const loading = fullLogLoadingRef.current;
+    for (let page = Math.floor(first / LOG_PAGE_SIZE); page * LOG_PAGE_SIZE < Math.max(last, 1); page++) {
+      if (!id || pages.has(page) || loading.has(page)) {
+        continue;
+      }
+      loading.add(page);
+      fetch(`http://localhost:8002/jobs/${id}/log?offset=${page * LOG_PAGE_SIZE}&limit=${LOG_PAGE_SIZE}`)
+        .then(response => response.json())
+        .then(data => {
+          pages.set(page, data.lines);
+          // Keep memory bounded; evicted pages are fetched again if scrolled back into view
+          if (pages.size > LOG_CACHED_PAGES) {
+            pages.delete(pages.keys().next().value);
+          }
+          setFullLogTotal(data.total);
+          setFullLogVersion(version => version + 1);
+        })
+        .catch(error => {
+          console.error('Error loading log page:', error);
+        })
+        .finally(() => loading.delete(page));
+    }
+  }, []);
+
+  const toggleFullLog = () => {
+    // Every opening is a fresh snapshot of the server's log
+    fullLogPagesRef.current = new Map();
+    setFullLogTotal(0);
+    setShowFullLog(show => !show);
+  };
+
+  // Close the current connection on purpose, so its onclose doesn't try to resume
+  const closeLogStream = () => {
+    const ws = websocketRef.current;
+    websocketRef.current = null;
+    if (ws) {
+      ws.close();
+    }
+  };
+
+  const openLogStream = (url) => {
+    const ws = new WebSocket(url);
+    websocketRef.current = ws;
+
+    ws.onopen = () => {
+      setIsConnected(true);
+      addLog('✅ Connected to server successfully');
+    };
+
+    ws.onmessage = (event) => {
+      reconnectsRef.current = 0;
+      // The server batches several log lines into one frame
+      const lines = [];
+      event.data.split('\n').forEach(line => {
+        // The server announces the id of the job this connection is running
+        if (line.startsWith('[JOB] ')) {
+          const id = line.slice('[JOB] '.length);
+          if (id !== jobIdRef.current) {
+            jobIdRef.current = id;
+            setJobId(id);
+            lines.push(`Job id: ${id}`);
+          }
+          return;
+        }
+        // The job's log follows from this line; count lines from here to know where to resume
+        if (line.startsWith('[OFFSET] ')) {
+          const offset = parseInt(line.slice('[OFFSET] '.length), 10);
+          // A viewer that falls too far behind is skipped forward to the live log
+          if (offset > logOffsetRef.current) {
+            lines.push(`... ${offset - logOffsetRef.current} lines skipped (open the full log to see them)`);
+          }
+          logOffsetRef.current = offset;
+          return;
+        }
+        logOffsetRef.current += 1;
+        // Clone progress arrives as structured events; show them in place instead of as log lines
+        if (line.startsWith('[PROGRESS] ')) {
+          try {
+            setCloneProgress(JSON.parse(line.slice('[PROGRESS] '.length)));
+            return;
+          } catch (e) {
+            // Fall through and log the raw message
+          }
+        }
+        lines.push(line);
+      });
+      if (lines.length > 0) {
+        appendLogs(lines);
+      }
+    };
+
+    ws.onclose = (event) => {
+      if (websocketRef.current !== ws) {
+        return;
+      }
+      // The server closes normally once the job is over; anything else is a dropped connection
+      if (event.code !== 1000 && jobIdRef.current && reconnectsRef.current < MAX_RECONNECTS) {
+        reconnectsRef.current += 1;
+        addLog(`Connection lost, resuming job ${jobIdRef.current} from line ${logOffsetRef.current}...`);
+        setTimeout(() => {
+          if (websocketRef.current === ws) {
+            openLogStream(`ws://localhost:8002/ws/run-repo?job_id=${jobIdRef.current}&offset=${logOffsetRef.current}`);
+          }
+        }, 1000 * reconnectsRef.current);
+        return;
+      }
+      setIsConnected(false);
+      addLog('Connection closed');
+      // Only set isRunning to false if setup isn't complete
+      if (!isSetupComplete) {
+        setIsRunning(false);
+      }
+    };
+
+    ws.onerror = (error) => {
+      setIsConnected(false);
+      addLog(`WebSocket Error: ${error.message || 'Connection failed'}`);
+      addLog('Please make sure the backend server is running on port 8002');
+    };
+  };
+
+  // Follow this run's status as the server pushes changes, instead of polling /status
   useEffect(() => {
-    if (isRunning) {
-      const statusInterval = setInterval(() => {
-        fetch('http://localhost:8002/status')
-          .then(response => response.json())
-          .then(data => {
-            if (data.backend_running && data.frontend_running) {
-              setIsSetupComplete(true);
-              clearInterval(statusInterval);
-              addLog("[SUCCESS] Setup complete! You can now access the application.");
-            }
-          })
-          .catch(error => {
-            console.error('Error checking status:', error);
-          });
-      }, 3000); // Check every 3 seconds (more frequent)
-      
-      return () => clearInterval(statusInterval);
+    if (isRunning && jobId) {
+      const events = new EventSource(`http://localhost:8002/jobs/${jobId}/events`);
+      events.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        // Each run leases its own port pair; follow whatever the server assigned
+        if (data.backend_port && data.frontend_port) {
+          setAppPorts({ backend: data.backend_port, frontend: data.frontend_port });
+        }
+        if (data.backend_running && data.frontend_running) {
+          setIsSetupComplete(true);
+          events.close();
+          addLog("[SUCCESS] Setup complete! You can now access the application.");
+        }
+      };
+      events.onerror = () => {
+        // EventSource reconnects by itself; Last-Event-ID skips statuses we already have
+        console.error('Status stream interrupted');
+      };
+
+      return () => events.close();
     }
-  }, [isRunning]);
+  }, [isRunning, jobId]);
 
   // More clearly show the repository command execution flow in logs
   const runRepository = () => {
     setIsRunning(true);
-    setLogs([
+    logBuffer.clear();
+    pendingLogsRef.current = [];
+    setShowFullLog(false);
+    appendLogs([
       `Starting GitHub Repository Runner...`,
       `Repository: https://github.com/AmruthaYalla04/aichatbot.git`,
       `Main app running on ports 3002/8002`,
-      `Cloned app will run on ports 3000/8000`,
+      `Cloned app will run on a leased port pair (3000/8000 when free)`,
       `Connecting to server at ws://localhost:8002/ws/run-repo...`
     ]);
     setIsSetupComplete(false);
+    setCloneProgress(null);
+    setJobId(null);
+    jobIdRef.current = null;
+    logOffsetRef.current = 0;
+    reconnectsRef.current = 0;
 
     // Close existing connection if there is one
-    if (websocketRef.current) {
-      websocketRef.current.close();
-    }
+    closeLogStream();
 
     // Add a timeout to ensure the backend is ready
     setTimeout(() => {
@@ -73,33 +330,7 @@ function App() {
             if (response.ok) {
               addLog('Backend server is available, connecting to WebSocket...');
               // Connect to the WebSocket
-              const ws = new WebSocket('ws://localhost:8002/ws/run-repo');
-              websocketRef.current = ws;
-              
-              ws.onopen = () => {
-                setIsConnected(true);
-                addLog('✅ Connected to server successfully');
-              };
-          
-              ws.onmessage = (event) => {
-                addLog(event.data);
-              };
-          
-              ws.onclose = () => {
-                setIsConnected(false);
-                addLog('Connection closed');
-                // Only set isRunning to false if setup isn't complete
-                if (!isSetupComplete) {
-                  setIsRunning(false);
-                }
-              };
-          
-              ws.onerror = (error) => {
-                setIsConnected(false);
-                addLog(`WebSocket Error: ${error.message || 'Connection failed'}`);
-                addLog('Please make sure the backend server is running on port 8002');
-                setIsRunning(false);
-              };
+              openLogStream('ws://localhost:8002/ws/run-repo');
             } else {
               throw new Error(`Server responded with status: ${response.status}`);
             }
@@ -117,6 +348,16 @@ function App() {
     }, 1000); // Wait 1 second before connecting
   };
 
+  // Run the last job again in its workspace; steps with valid checkpoints are skipped
+  const resumeRepository = () => {
+    setIsRunning(true);
+    setCloneProgress(null);
+    reconnectsRef.current = 0;
+    addLog(`Resuming job ${jobIdRef.current}...`);
+    closeLogStream();
+    openLogStream(`ws://localhost:8002/ws/run-repo?job_id=${jobIdRef.current}&offset=${logOffsetRef.current}&resume=1`);
+  };
+
   const executeScript = async () => {
     try {
       addLog("Starting command execution in separate window...");
@@ -146,33 +387,30 @@ function App() {
     }
   };
 
-  const addLog = (message) => {
-    setLogs(prevLogs => [...prevLogs, message]);
-  };
-
   const accessApplication = () => {
     // Show loading message
     addLog("Opening AI Chatbot application...");
     
     // First try to check if the application is actually ready
-    fetch('http://localhost:3000')
+    const appUrl = `http://localhost:${appPorts.frontend}`;
+    fetch(appUrl)
       .then(response => {
         // Application is responding, open it
-        window.open('http://localhost:3000', '_blank');
+        window.open(appUrl, '_blank');
         addLog("✅ Application opened in new tab");
       })
       .catch(error => {
         console.error('Error checking application availability:', error);
         // Try to open it anyway, but with a warning
         addLog("⚠️ Could not verify if application is running. Opening anyway...");
-        window.open('http://localhost:3000', '_blank');
+        window.open(appUrl, '_blank');
         
         // Show more detailed help if there's an issue
         setTimeout(() => {
           addLog("If the application doesn't load correctly:");
           addLog("1. Make sure both backend and frontend windows are still open");
-          addLog("2. Check that backend is running on port 8000");
-          addLog("3. Check that frontend is running on port 3000");
+          addLog(`2. Check that backend is running on port ${appPorts.backend}`);
+          addLog(`3. Check that frontend is running on port ${appPorts.frontend}`);
           addLog("4. Try refreshing the application tab after a few seconds");
         }, 2000);
       });
@@ -192,10 +430,19 @@ function App() {
           >
             {isRunning ? 'Running...' : isSetupComplete ? 'Setup Complete' : 'Run Repository'}
           </button>
+
+          {jobId && !isRunning && !isSetupComplete && (
+            <button
+              onClick={resumeRepository}
+              className="run-button"
+            >
+              Resume Job
+            </button>
+          )}
           
           {isConnected && !isSetupComplete && (
             <div className="connection-status connected">
-              Connected to server
+              Connected to server{jobId ? ` (job ${jobId})` : ''}
             </div>
           )}
           
@@ -222,16 +469,46 @@ function App() {
           )}
         </div>
 
+        {cloneProgress && (
+          <div className="clone-progress">
+            {cloneProgress.phase}
+            {cloneProgress.percent !== null ? `: ${cloneProgress.percent}%` : ''}
+            {cloneProgress.objects !== null ? ` (${cloneProgress.objects}/${cloneProgress.total_objects} objects)` : ''}
+            {cloneProgress.bytes !== null ? ` ${(cloneProgress.bytes / (1024 * 1024)).toFixed(2)} MiB` : ''}
+          </div>
+        )}
+
         <div className="log-container">
           <h3>Command Output:</h3>
-          <div className="logs">
-            {logs.map((log, index) => (
-              <div key={index} className="log-line">
-                {log}
-              </div>
-            ))}
-            <div ref={logEndRef} />
-          </div>
+          {jobId && (
+            <div className="log-toolbar">
+              <button onClick={toggleFullLog} className="log-toggle">
+                {showFullLog ? 'Show live output' : 'Show full log'}
+              </button>
+              {!showFullLog && logBuffer.dropped > 0 && (
+                <span>{logBuffer.dropped} earlier lines are only kept on the server</span>
+              )}
+            </div>
+          )}
+          {showFullLog ? (
+            <LogView
+              key="full"
+              count={fullLogTotal}
+              getLine={index => {
+                const page = fullLogPagesRef.current.get(Math.floor(index / LOG_PAGE_SIZE));
+                return page ? page[index % LOG_PAGE_SIZE] : undefined;
+              }}
+              version={fullLogVersion}
+              onRangeChange={loadFullLog}
+            />
+          ) : (
+            <LogView
+              key="live"
+              count={logBuffer.length}
+              getLine={index => logBuffer.get(index)}
+              version={logVersion}
+            />
+          )}
         </div>
       </header>
     </div>
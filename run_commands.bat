@@ -2,13 +2,17 @@ REM filepath: c:\Users\Divya Sri\Desktop\demo\run_commands.bat
 @echo off
 setlocal EnableDelayedExpansion
 
+REM Ports for the cloned app; set these beforehand to run several copies side by side
+if not defined BACKEND_PORT set BACKEND_PORT=8000
+if not defined FRONTEND_PORT set FRONTEND_PORT=3000
+
 echo =====================================================
 echo     GitHub Repository Runner - Command Script
 echo =====================================================
 echo This script will clone and run the AI Chatbot repository
 echo PORTS:
 echo   - Main application: Frontend 3002, Backend 8002
-echo   - Cloned repository: Frontend 3000, Backend 8000
+echo   - Cloned repository: Frontend %FRONTEND_PORT%, Backend %BACKEND_PORT%
 echo =====================================================
 echo.
 
@@ -199,9 +203,9 @@ if not exist main.py (
 )
 
 echo [%TIME%] Starting backend server with uvicorn...
-echo [%TIME%] Command: python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000
+echo [%TIME%] Command: python -m uvicorn main:app --reload --host 0.0.0.0 --port %BACKEND_PORT%
 
-start "AI Chatbot Backend (PORT 8000)" cmd /k "cd /d %cd% && call venv\Scripts\activate && python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000"
+start "AI Chatbot Backend (PORT %BACKEND_PORT%)" cmd /k "cd /d %cd% && call venv\Scripts\activate && python -m uvicorn main:app --reload --host 0.0.0.0 --port %BACKEND_PORT%"
 
 REM Wait for backend to start and verify it's running
 echo [%TIME%] Waiting for backend to initialize (20 seconds)...
@@ -209,7 +213,7 @@ timeout /t 20 /nobreak > nul
 
 REM Check if backend is running
 echo [%TIME%] Verifying backend is running...
-powershell -Command "& {try { $response = Invoke-WebRequest -Uri 'http://localhost:8000' -UseBasicParsing -TimeoutSec 5; if ($response.StatusCode -lt 400) { Write-Host '✓ Backend is running successfully.' } else { Write-Host '⚠️ Backend returned status code:' + $response.StatusCode } } catch { Write-Host '⚠️ Backend may not be running: ' + $_.Exception.Message }}"
+powershell -Command "& {try { $response = Invoke-WebRequest -Uri 'http://localhost:%BACKEND_PORT%' -UseBasicParsing -TimeoutSec 5; if ($response.StatusCode -lt 400) { Write-Host '✓ Backend is running successfully.' } else { Write-Host '⚠️ Backend returned status code:' + $response.StatusCode } } catch { Write-Host '⚠️ Backend may not be running: ' + $_.Exception.Message }}"
 
 echo [%TIME%] ✓ STEP 7 COMPLETE: Backend server started.
 echo.
@@ -245,9 +249,9 @@ echo.
 
 REM STEP 10: Start frontend with PORT explicitly set
 echo [%TIME%] STEP 10: Starting frontend server...
-echo [%TIME%] Command: set PORT=3000 && npm start
+echo [%TIME%] Command: set PORT=%FRONTEND_PORT% && npm start
 
-start "AI Chatbot Frontend (PORT 3000)" cmd /k "cd /d %cd% && set PORT=3000 && npm start"
+start "AI Chatbot Frontend (PORT %FRONTEND_PORT%)" cmd /k "cd /d %cd% && set PORT=%FRONTEND_PORT% && npm start"
 
 echo [%TIME%] Waiting for frontend to initialize (20 seconds)...
 timeout /t 20 /nobreak > nul
@@ -261,14 +265,14 @@ echo =====================================================
 echo.
 echo The AI Chatbot application is now running:
 echo.
-echo ✓ Backend API: http://localhost:8000
-echo ✓ Frontend UI: http://localhost:3000
+echo ✓ Backend API: http://localhost:%BACKEND_PORT%
+echo ✓ Frontend UI: http://localhost:%FRONTEND_PORT%
 echo.
 echo To access the application, open your browser and go to:
 echo.
-echo    http://localhost:3000
+echo    http://localhost:%FRONTEND_PORT%
 echo.
-start "" "http://localhost:3000"
+start "" "http://localhost:%FRONTEND_PORT%"
 echo A browser window should now open with the application.
 echo.
 echo Close this window when you're finished using the app
@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# Ports for the cloned app; override to run several copies side by side
+BACKEND_PORT="${BACKEND_PORT:-8000}"
+FRONTEND_PORT="${FRONTEND_PORT:-3000}"
+
 # Display title and information
 echo "======================================================="
 echo "     GitHub Repository Runner - Command Script         "
@@ -7,7 +11,7 @@ echo "======================================================="
 echo "This script will clone and run the AI Chatbot repository"
 echo "PORTS:"
 echo "  - Main application: Frontend 3002, Backend 8002"
-echo "  - Cloned repository: Frontend 3000, Backend 8000"
+echo "  - Cloned repository: Frontend $FRONTEND_PORT, Backend $BACKEND_PORT"
 echo "======================================================="
 echo ""
 
@@ -77,8 +81,8 @@ else
 fi
 
 # Start backend server in background
-echo "[$(date +%T)] Starting backend server on port 8000..."
-uvicorn main:app --reload --host 0.0.0.0 --port 8000 &
+echo "[$(date +%T)] Starting backend server on port $BACKEND_PORT..."
+uvicorn main:app --reload --host 0.0.0.0 --port "$BACKEND_PORT" &
 BACKEND_PID=$!
 echo "[$(date +%T)] Backend server started with PID: $BACKEND_PID"
 
@@ -103,8 +107,8 @@ echo "[$(date +%T)] Installing frontend dependencies with npm..."
 npm install
 
 # Start frontend server
-echo "[$(date +%T)] Starting frontend server on port 3000..."
-PORT=3000 npm start &
+echo "[$(date +%T)] Starting frontend server on port $FRONTEND_PORT..."
+PORT="$FRONTEND_PORT" npm start &
 FRONTEND_PID=$!
 echo "[$(date +%T)] Frontend server started with PID: $FRONTEND_PID"
 
@@ -113,11 +117,11 @@ echo ""
 echo "======================================================="
 echo "          APPLICATION SETUP COMPLETE!                  "
 echo "======================================================="
-echo "Backend is running at: http://localhost:8000"
-echo "Frontend is running at: http://localhost:3000"
+echo "Backend is running at: http://localhost:$BACKEND_PORT"
+echo "Frontend is running at: http://localhost:$FRONTEND_PORT"
 echo ""
 echo "To access the application, open your browser and go to:"
-echo "http://localhost:3000"
+echo "http://localhost:$FRONTEND_PORT"
 echo ""
 echo "Press Ctrl+C to stop the servers"
 echo "======================================================="